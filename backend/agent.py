@@ -0,0 +1,57 @@
+# backend/agent.py
+# Agent mode: scan this machine and push its inventory to a central server,
+# which resolves latest versions once for the whole fleet.
+#
+#   python agent.py --server http://central:8000              (push once)
+#   python agent.py --server http://central:8000 --interval 900
+import argparse
+import gzip
+import json
+import random
+import socket
+import time
+
+import requests
+from utils.scanner import get_installed_apps
+
+PUSH_TIMEOUT = 30
+
+
+def encode_inventory(apps: list) -> bytes:
+    """Gzip-compressed NDJSON, one {"name", "version"} object per line."""
+    lines = "".join(json.dumps({"name": a["name"], "version": a["version"]}) + "\n" for a in apps)
+    return gzip.compress(lines.encode("utf-8"))
+
+
+def push_inventory(server: str, host_id: str) -> dict:
+    apps = get_installed_apps()
+    resp = requests.post(
+        f"{server.rstrip('/')}/hosts/{host_id}/inventory",
+        data=encode_inventory(apps),
+        headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"},
+        timeout=PUSH_TIMEOUT,
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Push this host's installed apps to a central server.")
+    parser.add_argument("--server", required=True, help="e.g. http://central:8000")
+    parser.add_argument("--host-id", default=socket.gethostname())
+    parser.add_argument("--interval", type=float, default=0, help="seconds between pushes; 0 pushes once")
+    args = parser.parse_args(argv)
+
+    while True:
+        try:
+            print(push_inventory(args.server, args.host_id))
+        except (requests.RequestException, OSError) as e:
+            print(f"Push failed: {e}")
+        if args.interval <= 0:
+            break
+        # Jitter so a fleet started together doesn't push in lockstep
+        time.sleep(args.interval * random.uniform(0.9, 1.1))
+
+
+if __name__ == "__main__":
+    main()
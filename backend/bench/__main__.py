@@ -0,0 +1,144 @@
+# Offline benchmark suite for the scan, resolution and packaging hot paths.
+#
+# Everything runs against local stand-ins: a synthetic dpkg status file,
+# shell stubs for `winget` and `dpkg-query` on PATH, and a local HTTP server
+# playing PyPI, npm, the .NET release metadata and the installer hosts.
+# Each inventory size runs in a fresh worker process; results are printed
+# (or written with --output) as JSON so two revisions can be compared.
+#
+#   cd backend && python -m bench
+#   python -m bench --sizes 100,1000 --latency-ms 50 --output before.json
+#
+# POSIX only (the stubs are shell scripts and the scanner path is Linux's).
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench.fixtures import synthetic_inventory, write_dpkg_status, write_stubs
+from bench.stub_server import StubRegistry
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _int_list(value: str) -> list:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def worker_env(work_dir: str, bin_dir: str, stub_url: str, args) -> dict:
+    """Point every data source and backend at the stubs, and all state at `work_dir`."""
+    env = dict(os.environ)
+    cache = os.path.join(work_dir, "cache")
+    env.update({
+        "PATH": bin_dir + os.pathsep + env.get("PATH", ""),
+        "PYTHONPATH": str(BACKEND_DIR),
+        "DPKG_STATUS_PATH": os.path.join(work_dir, "status"),
+        "APK_INSTALLED_PATH": os.path.join(work_dir, "missing-apk"),
+        "RPM_DB_PATH": os.path.join(work_dir, "missing-rpm"),
+        "PYPI_URL": f"{stub_url}/pypi",
+        "NPM_REGISTRY_URL": f"{stub_url}/npm",
+        "DOTNET_INDEX_URL": f"{stub_url}/dotnet/releases-index.json",
+        "VERSION_CACHE_PATH": os.path.join(cache, "versions.db"),
+        "OFFLINE_CATALOG_PATH": os.path.join(cache, "catalog.db"),
+        "LATEST_VERSIONS_PATH": os.path.join(work_dir, "latest_versions.json"),
+        "OFFLINE_MODE": args.offline_mode,
+        "OFFLINE_DOWNLOAD_DIR": os.path.join(cache, "downloads"),
+        "INSTALLER_STORE_DIR": os.path.join(cache, "installers"),
+        "UNKNOWN_APPS_LOG": os.path.join(cache, "unknown_apps.log"),
+        "SCAN_REFRESH_INTERVAL": "3600",  # one scheduled scan at startup, then served from the snapshot
+        "FLEET_CYCLE_INTERVAL": "3600",
+    })
+    return env
+
+
+def run_size(size: int, stub: StubRegistry, args) -> dict:
+    work_dir = tempfile.mkdtemp(prefix=f"bench_{size}_")
+    try:
+        apps = synthetic_inventory(size, seed=args.seed)
+        write_dpkg_status(os.path.join(work_dir, "status"), apps, seed=args.seed)
+        bin_dir = os.path.join(work_dir, "bin")
+        write_stubs(bin_dir, work_dir, apps, latency=args.stub_latency_ms / 1000, seed=args.seed)
+
+        output = os.path.join(work_dir, "result.json")
+        command = [
+            sys.executable, "-m", "bench.worker",
+            "--size", str(size),
+            "--stub-url", stub.url,
+            "--work-dir", work_dir,
+            "--output", output,
+            "--repeat", str(args.repeat),
+            "--requests", str(args.requests),
+            "--clients", ",".join(str(c) for c in args.clients),
+            "--installers", str(args.installers),
+            "--installer-bytes", str(args.installer_kb * 1024),
+            "--timeout", str(args.timeout),
+        ]
+        started = time.perf_counter()
+        # The app prints diagnostics to stdout; keep them out of the JSON
+        subprocess.run(command, cwd=BACKEND_DIR, env=worker_env(work_dir, bin_dir, stub.url, args),
+                       stdout=sys.stderr, check=True, timeout=args.timeout)
+        with open(output, encoding="utf-8") as f:
+            result = json.load(f)
+        result["wall_seconds"] = round(time.perf_counter() - started, 2)
+        return result
+    finally:
+        if args.keep:
+            print(f"[bench] kept {work_dir}", file=sys.stderr)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Offline benchmarks for the scan pipeline.")
+    parser.add_argument("--sizes", type=_int_list, default=[100, 1000, 10000], help="inventory sizes (apps)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed repetitions per benchmark")
+    parser.add_argument("--clients", type=_int_list, default=[1, 8, 32], help="concurrent /scan clients")
+    parser.add_argument("--requests", type=int, default=20, help="/scan requests per client")
+    parser.add_argument("--latency-ms", type=float, default=20, help="stub registry delay per response")
+    parser.add_argument("--stub-latency-ms", type=float, default=0, help="delay per winget/dpkg-query call")
+    parser.add_argument("--installers", type=int, default=8, help="installers in each offline package")
+    parser.add_argument("--installer-kb", type=int, default=1024, help="size of each stub installer")
+    parser.add_argument("--offline-mode", choices=("off", "prefer", "strict"), default="off",
+                        help="OFFLINE_MODE for the run (default: always resolve over the stubs)")
+    parser.add_argument("--seed", type=int, default=1, help="seed for the synthetic inventory")
+    parser.add_argument("--timeout", type=float, default=1800, help="seconds allowed per size")
+    parser.add_argument("--keep", action="store_true", help="keep each size's work directory")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    stub = StubRegistry(latency=args.latency_ms / 1000, installer_bytes=args.installer_kb * 1024).start()
+    try:
+        report = {
+            "revision": revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {k: v for k, v in vars(args).items() if k not in ("output", "keep")},
+            "results": [run_size(size, stub, args) for size in args.sizes],
+        }
+    finally:
+        stub.shutdown()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
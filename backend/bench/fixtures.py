@@ -0,0 +1,135 @@
+import os
+import random
+import stat
+
+# Names that hit each resolution path (mapping rules, fallbacks, winget index)
+MAPPED_APPS = [
+    ("pip", "23.0.1"),
+    ("setuptools", "68.1.2"),
+    ("Node.js", "20.11.0"),
+    ("npm", "9.2.0"),
+    ("Python 3", "3.12.1"),
+    ("Google Chrome", "120.0.6099.71"),
+    ("Microsoft Edge", "121.0.2277.83"),
+    ("Java SE Development Kit", "21.0.2"),
+    ("Microsoft .NET Host - 6.0", "6.0.25"),
+    ("Microsoft .NET Host - 8.0", "8.0.1"),
+    ("Microsoft ASP.NET Core 8.0", "8.0.1"),
+    ("Microsoft Visual C++ 2019 X64 Debug Runtime", "14.29.30139"),
+]
+
+# Installed via winget and present in its bulk listing
+WINGET_LISTED = [
+    ("Python 3", "Python.Python.3", "3.12.1", "3.13.3"),
+    ("Node.js", "OpenJS.NodeJS", "20.11.0", "22.3.0"),
+    ("Google Chrome", "Google.Chrome", "120.0.6099.71", "131.0.6778.86"),
+    ("Microsoft Edge", "Microsoft.Edge", "121.0.2277.83", ""),
+    ("Java SE Development Kit", "Oracle.JDK.22", "22.0.1", "22.0.2"),
+]
+
+_WORDS = [
+    "ssl", "curl", "xml", "gtk", "qt", "boost", "sqlite", "png", "jpeg", "zstd", "lz4", "icu", "glib",
+    "dbus", "pam", "krb", "ldap", "nss", "pcre", "yaml", "json", "magic", "archive", "bz", "event",
+]
+_SUFFIXES = ["", "-dev", "-common", "-bin", "-data", "-utils", "-doc"]
+
+
+def debian_version(rng: random.Random) -> str:
+    """A realistic mix: epochs, Debian revisions, Ubuntu/backport suffixes and tildes."""
+    upstream = ".".join(str(rng.randint(0, 30)) for _ in range(rng.choice((2, 3, 3, 4))))
+    if rng.random() < 0.15:
+        upstream += rng.choice(("~rc1", "~beta2", "+dfsg", "+really1.0"))
+    version = f"{upstream}-{rng.randint(1, 9)}"
+    if rng.random() < 0.3:
+        version += rng.choice(("ubuntu1", "ubuntu2.1", "+deb12u1", "build1", "~22.04.1"))
+    if rng.random() < 0.1:
+        version = f"{rng.randint(1, 3)}:{version}"
+    return version
+
+
+def synthetic_inventory(size: int, seed: int = 1) -> list:
+    """`size` unique (name, version) pairs; roughly 10% go through mapping rules."""
+    rng = random.Random(seed)
+    apps = {}
+    mapped = MAPPED_APPS * (size // (10 * len(MAPPED_APPS)) + 1)
+    for i, (name, version) in enumerate(mapped[:max(1, size // 10)]):
+        apps[name if i < len(MAPPED_APPS) else f"{name} ({i})"] = version
+    n = 0
+    while len(apps) < size:
+        name = f"lib{rng.choice(_WORDS)}{n}{rng.choice(_SUFFIXES)}"
+        apps[name] = debian_version(rng)
+        n += 1
+    return list(apps.items())[:size]
+
+
+def write_dpkg_status(path: str, apps: list, seed: int = 1) -> str:
+    """A dpkg status file listing `apps`, plus a few removed packages the parser must skip."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        for i, (name, version) in enumerate(apps):
+            f.write(
+                f"Package: {name}\n"
+                "Status: install ok installed\n"
+                "Priority: optional\n"
+                "Section: libs\n"
+                f"Installed-Size: {rng.randint(10, 50000)}\n"
+                "Maintainer: Bench <bench@example.invalid>\n"
+                "Architecture: amd64\n"
+                f"Version: {version}\n"
+                "Depends: libc6 (>= 2.34)\n"
+                f"Description: synthetic package {i}\n"
+                " Long description line for a synthetic package.\n\n"
+            )
+            if i % 50 == 0:
+                f.write(f"Package: removed-{i}\nStatus: deinstall ok config-files\nVersion: 1.0-1\n\n")
+    return path
+
+
+def winget_table(rows: list) -> str:
+    """`winget list` output for (name, id, version, available) rows."""
+    header = f"{'Name':<45} {'Id':<40} {'Version':<20} {'Available':<20} Source"
+    lines = [header, "-" * len(header)]
+    for name, app_id, version, available in rows:
+        lines.append(f"{name:<45} {app_id:<40} {version:<20} {available:<20} winget")
+    return "\n".join(lines) + "\n"
+
+
+def _write_script(path: str, body: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("#!/bin/sh\n" + body)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+
+def write_stubs(bin_dir: str, data_dir: str, apps: list, latency: float = 0.0, seed: int = 1):
+    """
+    POSIX shell stand-ins for `winget` and `dpkg-query`, each sleeping
+    `latency` seconds per call:
+
+    - `winget list` prints a fixed table, `winget show <id>` answers for
+      about a third of the synthetic packages, `winget search` finds nothing
+    - `dpkg-query -W` prints the inventory as "name version" lines
+    """
+    rng = random.Random(seed)
+    os.makedirs(bin_dir, exist_ok=True)
+    delay = f"sleep {latency}\n" if latency else ""
+
+    list_path = os.path.join(data_dir, "winget-list.txt")
+    with open(list_path, "w", encoding="utf-8") as f:
+        f.write(winget_table(WINGET_LISTED))
+    catalog_path = os.path.join(data_dir, "winget-catalog.txt")
+    with open(catalog_path, "w", encoding="utf-8") as f:
+        for name, _ in apps:
+            if " " not in name and rng.random() < 0.33:
+                f.write(f"{name} {rng.randint(1, 30)}.{rng.randint(0, 9)}.{rng.randint(0, 9)}\n")
+    listing_path = os.path.join(data_dir, "dpkg-query.txt")
+    with open(listing_path, "w", encoding="utf-8") as f:
+        f.writelines(f"{name} {version}\n" for name, version in apps)
+
+    _write_script(os.path.join(bin_dir, "winget"), delay + f"""case "$1" in
+  list) cat '{list_path}' ;;
+  show) awk -v id="$2" '$1 == id {{ print "Found " id; print "Version: " $2; found = 1; exit }}
+        END {{ exit !found }}' '{catalog_path}' ;;
+  *) echo "No package found matching input criteria."; exit 1 ;;
+esac
+""")
+    _write_script(os.path.join(bin_dir, "dpkg-query"), delay + f"cat '{listing_path}'\n")
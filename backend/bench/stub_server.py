@@ -0,0 +1,138 @@
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Versions served for every package; the synthetic inventory is mostly older
+PYPI_LATEST = "24.3.1"
+NPM_LATEST = "10.9.2"
+DOTNET_CHANNELS = {"6.0": "6.0.36", "8.0": "8.0.11"}
+
+
+class StubRegistry(ThreadingHTTPServer):
+    """
+    Local stand-in for PyPI, the npm registry, the .NET release metadata and
+    installer downloads. Every response is delayed by `latency` seconds and
+    counted per endpoint, so a run can report how many requests it made.
+
+        /pypi/<name>/json                      PyPI JSON API
+        /npm/<name>/latest                     npm registry
+        /dotnet/releases-index.json            .NET releases index
+        /dotnet/<channel>/releases.json        one .NET channel
+        /installers/<name>                     installer bytes (ETag, Range, If-Range)
+        /_stats                                request counts so far (not delayed)
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.0, installer_bytes: int = 1024 * 1024, port: int = 0):
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.latency = latency
+        self.installer_bytes = installer_bytes
+        self.requests = Counter()
+        self._lock = threading.Lock()
+        self.set_payload((bytes(range(256)) * (installer_bytes // 256 + 1))[:installer_bytes])
+
+    def set_payload(self, payload: bytes):
+        """Serve different installer bytes from now on, as a "latest" URL does after a release."""
+        self.payload = payload
+        self.installer_etag = '"{}"'.format(hashlib.sha1(payload).hexdigest()[:16])
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, endpoint: str):
+        with self._lock:
+            self.requests[endpoint] += 1
+
+    def start(self) -> "StubRegistry":
+        threading.Thread(target=self.serve_forever, name="stub-registry", daemon=True).start()
+        return self
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real registries
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, data: dict):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_found(self):
+        self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        server = self.server
+        if self.path == "/_stats":
+            with server._lock:
+                return self._json(dict(server.requests))
+        if server.latency:
+            time.sleep(server.latency)
+        parts = self.path.split("?")[0].strip("/").split("/")
+
+        if parts[0] == "pypi" and len(parts) == 3:
+            server.count("pypi")
+            # "info" first, then a large "releases" map, like the real API
+            releases = {f"{major}.{minor}.0": [] for major in range(1, 25) for minor in range(10)}
+            return self._json({"info": {"name": parts[1], "version": PYPI_LATEST}, "releases": releases})
+
+        if parts[0] == "npm" and len(parts) == 3:
+            server.count("npm")
+            return self._json({"name": parts[1], "version": NPM_LATEST})
+
+        if parts[0] == "dotnet" and parts[-1] == "releases-index.json":
+            server.count("dotnet")
+            return self._json({"releases-index": [
+                {"channel-version": channel, "releases.json": f"{server.url}/dotnet/{channel}/releases.json"}
+                for channel in DOTNET_CHANNELS
+            ]})
+
+        if parts[0] == "dotnet" and len(parts) == 3 and parts[1] in DOTNET_CHANNELS:
+            server.count("dotnet")
+            latest = DOTNET_CHANNELS[parts[1]]
+            return self._json({"releases": [{
+                "runtime": {"version": latest},
+                "aspnetcore-runtime": {"version": latest},
+                "windowsdesktop": {"version": latest},
+                "sdk": {"version": f"{parts[1][0]}.0.100"},
+            }]})
+
+        if parts[0] == "installers" and len(parts) == 2:
+            server.count("installers")
+            return self._installer()
+
+        server.count("not_found")
+        self._not_found()
+
+    def _installer(self):
+        server = self.server
+        if self.headers.get("If-None-Match") == server.installer_etag:
+            self.send_response(304)
+            self.send_header("ETag", server.installer_etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        payload, status = server.payload, 200
+        requested = self.headers.get("Range", "")
+        if_range = self.headers.get("If-Range")
+        if requested.startswith("bytes=") and requested.endswith("-") and if_range in (None, server.installer_etag):
+            offset = int(requested[6:-1])
+            payload, status = payload[offset:], 206
+        self.send_response(status)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("ETag", server.installer_etag)
+        self.end_headers()
+        self.wfile.write(payload)
@@ -0,0 +1,200 @@
+# One benchmark run at a single inventory size, in its own process so peak
+# RSS and the subprocess counters belong to that size alone. Started by
+# `python -m bench` with the environment pointing every backend at stubs.
+import argparse
+import json
+import math
+import os
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import uvicorn
+
+import main
+from utils import package_db
+from utils.metrics import SUBPROCESS_SPAWNS_TOTAL
+from utils.scanner import get_installed_apps
+from utils.snapshots import SNAPSHOTS
+from utils.version_checker import check_latest_versions
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples: list, wall: float) -> dict:
+    ordered = sorted(samples)
+    return {
+        "n": len(samples),
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        "throughput_per_s": round(len(samples) / wall, 2) if wall > 0 else None,
+    }
+
+
+class Recorder:
+    """Times benchmarks and attributes subprocess spawns and stub requests to each."""
+
+    def __init__(self, stub_url: str):
+        self.stub_url = stub_url
+        self.results = {}
+        self._http = requests.Session()
+
+    def _stub_requests(self) -> dict:
+        return self._http.get(f"{self.stub_url}/_stats", timeout=10).json()
+
+    def run(self, name: str, func, repeat: int = 1, clients: int = 1, **extra):
+        """Call `func` `repeat` times on each of `clients` threads."""
+        spawns_before = SUBPROCESS_SPAWNS_TOTAL.snapshot()
+        requests_before = self._stub_requests()
+        samples, lock = [], threading.Lock()
+
+        def client():
+            local = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                func()
+                local.append(time.perf_counter() - start)
+            with lock:
+                samples.extend(local)
+
+        start = time.perf_counter()
+        if clients == 1:
+            client()
+        else:
+            with ThreadPoolExecutor(max_workers=clients) as pool:
+                for future in [pool.submit(client) for _ in range(clients)]:
+                    future.result()
+        wall = time.perf_counter() - start
+
+        spawns_after = SUBPROCESS_SPAWNS_TOTAL.snapshot()
+        requests_after = self._stub_requests()
+        result = summarize(samples, wall)
+        result["clients"] = clients
+        result["subprocesses"] = {
+            key[0]: spawns_after[key] - spawns_before.get(key, 0)
+            for key in spawns_after if spawns_after[key] != spawns_before.get(key, 0)
+        }
+        result["stub_requests"] = {
+            key: count - requests_before.get(key, 0)
+            for key, count in requests_after.items() if count != requests_before.get(key, 0)
+        }
+        result.update(extra)
+        self.results[name] = result
+        print(f"[bench] {name}: p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms", file=sys.stderr)
+        return result
+
+
+def start_server() -> tuple:
+    """Serve the app with uvicorn on a free local port; returns (server, base url)."""
+    config = uvicorn.Config(main.app, host="127.0.0.1", port=0, log_level="warning", access_log=False)
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, name="uvicorn", daemon=True).start()
+    deadline = time.time() + 30
+    while not server.started:
+        if time.time() > deadline:
+            raise RuntimeError("uvicorn did not start")
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return server, f"http://127.0.0.1:{port}"
+
+
+def run(args) -> dict:
+    rec = Recorder(args.stub_url)
+
+    # --- Inventory ---
+    rec.run("get_installed_apps_cold", get_installed_apps)
+    rec.run("get_installed_apps", get_installed_apps, repeat=args.repeat)
+    dpkg_status = package_db.DPKG_STATUS_PATH
+    package_db.DPKG_STATUS_PATH = os.path.join(args.work_dir, "missing-status")  # force the dpkg-query path
+    rec.run("get_installed_apps_dpkg_query", get_installed_apps, repeat=args.repeat)
+    package_db.DPKG_STATUS_PATH = dpkg_status
+
+    # --- Resolution ---
+    installed = {app["name"]: app["version"] for app in get_installed_apps()}
+    rec.run("check_latest_versions_cold", lambda: check_latest_versions(installed), apps=len(installed))
+    rec.run("check_latest_versions_warm", lambda: check_latest_versions(installed), repeat=args.repeat,
+            apps=len(installed))
+
+    # --- HTTP API ---
+    main.INSTALLER_URLS.clear()
+    main.INSTALLER_URLS.update({
+        name: f"{args.stub_url}/installers/setup-{i}.exe"
+        for i, name in enumerate(list(installed)[:args.installers])
+    })
+    server, base = start_server()
+    try:
+        deadline = time.time() + args.timeout
+        while SNAPSHOTS.latest is None:  # the scheduler's first scan
+            if time.time() > deadline:
+                raise RuntimeError("no snapshot before timeout")
+            time.sleep(0.05)
+
+        local = threading.local()
+
+        def get(path: str):
+            def call():
+                session = getattr(local, "session", None)
+                if session is None:
+                    session = local.session = requests.Session()
+                resp = session.get(base + path, timeout=args.timeout)
+                resp.raise_for_status()
+                resp.content
+            return call
+
+        for clients in args.clients:
+            rec.run(f"scan_c{clients}", get("/scan"), repeat=args.requests, clients=clients)
+            rec.run(f"scan_page_c{clients}", get("/scan?limit=100&sort=risk&status=update-available"),
+                    repeat=args.requests, clients=clients)
+
+        rec.run("generate_offline_package_cold", get("/generate-offline-package"),
+                installers=len(main.INSTALLER_URLS), installer_bytes=args.installer_bytes)
+        rec.run("generate_offline_package_warm", get("/generate-offline-package"), repeat=args.repeat,
+                installers=len(main.INSTALLER_URLS), installer_bytes=args.installer_bytes)
+        rec.run("generate_offline_package_delta", get("/generate-offline-package?mode=delta"),
+                repeat=args.repeat)
+        rec.run("generate_offline_package_stream", get("/generate-offline-package?stream=true"),
+                repeat=args.repeat)
+    finally:
+        server.should_exit = True
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "apps": args.size,
+        "peak_rss_mb": round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1),
+        "subprocesses_total": {key[0]: count for key, count in SUBPROCESS_SPAWNS_TOTAL.snapshot().items()},
+        "benchmarks": rec.results,
+    }
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.worker")
+    parser.add_argument("--size", type=int, required=True)
+    parser.add_argument("--stub-url", required=True)
+    parser.add_argument("--work-dir", required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--clients", type=lambda v: [int(c) for c in v.split(",")], default=[1, 8, 32])
+    parser.add_argument("--installers", type=int, default=8)
+    parser.add_argument("--installer-bytes", type=int, default=1024 * 1024)
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+if __name__ == "__main__":
+    main_cli()
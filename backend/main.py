@@ -1,18 +1,40 @@
-from fastapi import FastAPI, BackgroundTasks
+from fastapi import FastAPI, BackgroundTasks, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from utils.scanner import get_installed_apps
-from utils.version_checker import check_latest_versions
-from routes import simulate_attack
-import os
-import zipfile
-import tempfile
+from utils.snapshots import SNAPSHOTS, Snapshot, diff_snapshots, stream_incremental
+from utils.scan_query import MAX_PAGE_LIMIT, InvalidQuery, decode_cursor, encode_cursor
+from utils.scan_service import SCAN_SERVICE, SCHEDULER, ScanPending
+from utils.version_checker import MATCHER
+from utils.unknown_apps import UNKNOWN_APPS
+from contextlib import asynccontextmanager
+from utils.offline_package import BUILDS, installers_for_updates, stream_package
+from routes import drivers, hosts, simulate_attack
+from utils.fleet import FLEET_CYCLER
+from utils.metrics import CONTENT_TYPE, HTTP_REQUEST_SECONDS, HTTP_REQUEST_STAGE_SECONDS, REGISTRY, StageTimer, server_timing
+import asyncio
+import hashlib
 import time
-import requests
-import shutil
 import json
+from collections import Counter
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background re-scans keep /scan answers instant (SCAN_REFRESH_INTERVAL=0 disables)
+    SCHEDULER.start()
+    UNKNOWN_APPS.start()
+    FLEET_CYCLER.start()  # resolves inventories pushed by agents (see agent.py)
+    yield
+    await FLEET_CYCLER.stop()
+    await SCHEDULER.stop()
+    UNKNOWN_APPS.stop()  # final flush
+
 
 app = FastAPI(
+    lifespan=lifespan,
     title="Driver & App Security API",
     description="API for scanning installed apps, simulating attacks, and generating offline update packages.",
     version="1.1.0",
@@ -25,84 +47,344 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Build-Id", "Server-Timing"],
+)
+
+# Compress large JSON payloads. Streams (SSE, NDJSON) must reach the client
+# row by row and zips are already compressed, so those are left alone
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=1024,
+    compresslevel=6,
+    exclude_content_types=DEFAULT_EXCLUDED_CONTENT_TYPES + ("application/x-ndjson",),
 )
 
+
+# Request latency by route template (not raw path, so ids don't explode the label set)
+@app.middleware("http")
+async def observe_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status,
+        )
+
 # Include routers
 app.include_router(simulate_attack.router, tags=["Attack Simulation"])
+app.include_router(drivers.router, tags=["Drivers"])
+app.include_router(hosts.router, tags=["Fleet"])
 
 # --- Installer URL mapping (expand as needed) ---
 INSTALLER_URLS = {
     "Google Chrome": "https://dl.google.com/chrome/install/latest/chrome_installer.exe",
     "Microsoft Edge": "https://msedgesetup.azureedge.net/latest/MicrosoftEdgeSetup.exe",
     "Python 3": "https://www.python.org/ftp/python/3.13.3/python-3.13.3-amd64.exe",
-    ".NET Runtime 6.0": "https://download.visualstudio.microsoft.com/download/pr/41a44d4d-7cf1-4b3e-b38b-d06b3fd2b6e3/5ab9a0d7e2c90d1d472bdf58d8a9a9ff/dotnet-runtime-6.0.32-win-x64.exe",
-    ".NET Runtime 8.0": "https://download.visualstudio.microsoft.com/download/pr/d3d896c4-43e4-469f-9db7-2f3dc48c8f8c/4c94799b77f865cafd076d0d89992a76/dotnet-runtime-8.0.10-win-x64.exe",
+    "Microsoft .NET Runtime - 6.0": "https://download.visualstudio.microsoft.com/download/pr/41a44d4d-7cf1-4b3e-b38b-d06b3fd2b6e3/5ab9a0d7e2c90d1d472bdf58d8a9a9ff/dotnet-runtime-6.0.32-win-x64.exe",
+    "Microsoft .NET Runtime - 8.0": "https://download.visualstudio.microsoft.com/download/pr/d3d896c4-43e4-469f-9db7-2f3dc48c8f8c/4c94799b77f865cafd076d0d89992a76/dotnet-runtime-8.0.10-win-x64.exe",
 }
 
 
 # --- Scan Endpoint ---
+DEADLINE_HELP = (
+    "Return partial results after this many ms. With the background scheduler on "
+    "(SCAN_REFRESH_INTERVAL > 0), answers come from the latest snapshot and this only "
+    "bounds the wait for the first scan: past it the answer is 503 with Retry-After"
+)
+
+
+async def current_snapshot(deadline_ms: int = None) -> Snapshot:
+    # Serve the scheduler's latest completed scan instantly; only scan
+    # inline when there is none yet (or the scheduler is disabled). So with
+    # the scheduler on, deadline_ms only bounds the wait for the first scan
+    # (ScanPending when it runs out first).
+    snapshot = SNAPSHOTS.latest if SCHEDULER.enabled else None
+    if snapshot is None:
+        # Runs on the scan thread pool; concurrent callers share one in-flight scan
+        snapshot = await SCAN_SERVICE.scan(deadline_ms=deadline_ms)
+    return snapshot
+
+
+def scan_pending_response(e: ScanPending) -> JSONResponse:
+    return JSONResponse(status_code=503, content={"error": str(e)}, headers={"Retry-After": str(e.retry_after)})
+
+
+def snapshot_payload(snapshot: Snapshot, deadline_ms: int = None) -> dict:
+    response = {
+        "apps": snapshot.rows,
+        "snapshot_id": snapshot.id,
+        "age_seconds": round(time.time() - snapshot.created_at, 1),
+        "refreshing": SCHEDULER.refreshing,
+    }
+    if deadline_ms is not None:
+        response["pending"] = sum(1 for row in snapshot.rows if row["latest"] == "Pending")
+    return response
+
+
+def scan_server_timing(timer: StageTimer, snapshot: Snapshot) -> str:
+    """Request stages, then how the served snapshot itself was produced."""
+    return ", ".join(filter(None, [server_timing(timer.stages), server_timing(snapshot.timings, prefix="scan-")]))
+
+
 @app.get("/scan", tags=["Scanner"])
-async def scan_system():
+async def scan_system(
+    request: Request,
+    deadline_ms: int = Query(None, ge=1, description=DEADLINE_HELP),
+    since: str = Query(None, description="Only return rows added/removed/changed since this snapshot_id"),
+    status: str = Query(None, description="Comma-separated statuses, e.g. update-available,unknown"),
+    risk: str = Query(None, description="Comma-separated risk levels, e.g. high,medium"),
+    q: str = Query(None, description="Case-insensitive substring of the app name"),
+    sort: str = Query(None, description="name, status or risk (most severe first); prefix with - to reverse. "
+                                        "Default: inventory order"),
+    limit: int = Query(None, ge=1, le=MAX_PAGE_LIMIT, description="Page size (default: everything)"),
+    cursor: str = Query(None, description="next_cursor from the previous page"),
+):
+    timer = StageTimer(HTTP_REQUEST_STAGE_SECONDS, route="/scan")
     try:
-        installed_apps = get_installed_apps()
-        installed_apps_dict = {app["name"]: app["version"] for app in installed_apps}
-        latest_info = check_latest_versions(installed_apps_dict)
-        return {"apps": latest_info}
+        with timer.stage("wait"):
+            snapshot = await current_snapshot(deadline_ms)
+
+        # Delta response; unknown or evicted snapshot ids fall back to the full list
+        base = SNAPSHOTS.get(since) if since else None
+        if base is not None:
+            with timer.stage("diff"):
+                delta = {"snapshot_id": snapshot.id, "since": since, **diff_snapshots(base, snapshot)}
+            with timer.stage("serialize"):
+                result = JSONResponse(content=delta)
+            result.headers["Server-Timing"] = scan_server_timing(timer, snapshot)
+            return result
+
+        # Later pages stay on the cursor's snapshot while it is still held, so
+        # a background refresh can't shift rows between pages
+        offset = 0
+        if cursor:
+            cursor_snapshot_id, offset = decode_cursor(cursor)
+            snapshot = SNAPSHOTS.get(cursor_snapshot_id) or snapshot
+
+        # created_at and refreshing are part of the payload too, so a 304 never
+        # confirms an outdated age or refresh flag
+        etag = 'W/"{}"'.format(hashlib.sha1(json.dumps([
+            snapshot.id, snapshot.created_at, SCHEDULER.refreshing, status, risk, q, sort, limit, offset,
+        ]).encode()).hexdigest()[:20])
+        if etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers={"ETag": etag, "Server-Timing": server_timing(timer.stages)})
+
+        with timer.stage("query"):
+            index = snapshot.index
+            selected = index.select(status=status, risk=risk, q=q, sort=sort)
+            page_size = limit or len(selected)
+            response = snapshot_payload(snapshot, deadline_ms)
+            response["apps"] = index.page(selected, offset, page_size)
+            if any(p is not None for p in (status, risk, q, sort, limit, cursor)):
+                # Query responses only; a plain /scan keeps its original shape
+                response["total"] = len(selected)
+                end = offset + page_size
+                response["next_cursor"] = encode_cursor(snapshot.id, end) if end < len(selected) else None
+        with timer.stage("serialize"):
+            result = JSONResponse(content=response, headers={"ETag": etag})
+        result.headers["Server-Timing"] = scan_server_timing(timer, snapshot)
+        return result
+    except ScanPending as e:
+        return scan_pending_response(e)
+    except InvalidQuery as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+# --- Combined Inventory Endpoint ---
+@app.get("/inventory", tags=["Inventory"])
+async def get_inventory(
+    deadline_ms: int = Query(None, ge=1, description=DEADLINE_HELP),
+):
+    """Apps and drivers in one payload; both scans run at the same time."""
+    try:
+        snapshot, driver_report = await asyncio.gather(
+            current_snapshot(deadline_ms),
+            asyncio.to_thread(drivers.scan_drivers),
+        )
+        return {**snapshot_payload(snapshot, deadline_ms), "drivers": driver_report}
+    except ScanPending as e:
+        return scan_pending_response(e)
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+@app.post("/scan/refresh", tags=["Scanner"], status_code=202)
+async def refresh_scan():
+    """Start a background re-scan now (no-op if one is already running)."""
+    started = SCHEDULER.trigger()
+    return {"started": started, "refreshing": True}
+
+
+@app.get("/match", tags=["Scanner"])
+async def match_app_name(name: str):
+    """Show which mapping rules match an installed app name, best first."""
+    return {"name": name, "matches": [m.to_dict() for m in MATCHER.candidates(name)]}
+
+
+@app.get("/unknown", tags=["Scanner"])
+async def get_unknown_apps():
+    """How often each app's latest version could not be resolved (served from memory)."""
+    return {"unknown_apps": UNKNOWN_APPS.snapshot()}
+
+
+@app.get("/metrics", tags=["Monitoring"])
+async def metrics():
+    """Stage, backend, cache, subprocess, download and HTTP metrics in Prometheus text format."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/scan/stream", tags=["Scanner"])
+async def scan_system_stream(request: Request, stream_format: str = Query(None, alias="format", pattern="^(sse|ndjson)$")):
+    """
+    Streams each app row as soon as its latest version is resolved, then a
+    summary with counts by status and risk. Server-Sent Events by default;
+    NDJSON with `?format=ndjson` or `Accept: application/x-ndjson`.
+    """
+    if stream_format is None:
+        stream_format = "ndjson" if "application/x-ndjson" in request.headers.get("accept", "") else "sse"
+
+    def encode(event: str, data: dict) -> str:
+        if stream_format == "ndjson":
+            return json.dumps(data if event == "row" else {event: data}) + "\n"
+        if event == "row":
+            return f"data: {json.dumps(data)}\n\n"
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    # Plain generator: Starlette iterates it in a worker thread, off the event loop
+    def row_generator():
+        try:
+            timer = StageTimer()
+            with timer.stage("inventory"):
+                installed_apps = get_installed_apps()
+            installed_apps_dict = {app["name"]: app["version"] for app in installed_apps}
+            status_counts, risk_counts = Counter(), Counter()
+
+            for item in stream_incremental(installed_apps_dict, timer=timer):
+                if isinstance(item, Snapshot):
+                    summary = {
+                        "snapshot_id": item.id,
+                        "total": len(item.rows),
+                        "by_status": dict(status_counts),
+                        "by_risk": dict(risk_counts),
+                    }
+                    yield encode("summary", summary)
+                else:
+                    status_counts[item["status"]] += 1
+                    risk_counts[item["risk"]] += 1
+                    yield encode("row", item)
+        except Exception as e:
+            yield encode("error", {"error": str(e)})
+
+        if stream_format == "sse":
+            yield 'event: end\ndata: {"done": true}\n\n'
+
+    media_type = "application/x-ndjson" if stream_format == "ndjson" else "text/event-stream"
+    return StreamingResponse(
+        row_generator(),
+        media_type=media_type,
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 # --- Offline Package Generator ---
+async def select_installers(mode: str) -> tuple:
+    """All known installers, or for `delta` only those of apps with an update available."""
+    if mode != "delta":
+        return INSTALLER_URLS, None
+    snapshot = SNAPSHOTS.latest or await SCAN_SERVICE.scan()
+    return installers_for_updates(snapshot.rows, INSTALLER_URLS)
+
+
 @app.get("/generate-offline-package", tags=["Updates"])
-async def generate_offline_package(background_tasks: BackgroundTasks):
+async def generate_offline_package(
+    background_tasks: BackgroundTasks,
+    stream: bool = False,
+    mode: str = Query("full", pattern="^(full|delta)$"),
+):
     """
     Generate an offline update package with real installers for known apps.
+    Installers download concurrently; progress is visible at
+    /offline-package/builds/{id} using the X-Build-Id response header.
+
+    With `?stream=true` the zip is written straight into the response while
+    the installers download: the first byte goes out immediately and disk
+    use stays flat.
+
+    With `?mode=delta` only installers for apps whose status is
+    "Update Available" are packed. Installers are kept in a local
+    content-addressed store between builds and revalidated with
+    ETag / Last-Modified instead of being downloaded again. Delta packages
+    carry per-file sha256 hashes, so they cannot be streamed.
     """
-    timestamp = int(time.time())
-    temp_dir = tempfile.mkdtemp()
-    zip_path = os.path.join(temp_dir, f"offline_update_{timestamp}.zip")
+    if stream and mode == "delta":
+        return JSONResponse(status_code=400, content={"error": "mode=delta cannot be combined with stream=true"})
+    installers, updates = await select_installers(mode)
+    if stream:
+        return StreamingResponse(
+            stream_package(installers),
+            media_type="application/zip",
+            headers={"Content-Disposition": 'attachment; filename="offline_update_package.zip"'},
+        )
 
     try:
-        with zipfile.ZipFile(zip_path, "w") as zipf:
-            # Metadata
-            metadata = {
-                "generated_at": time.ctime(timestamp),
-                "included_apps": list(INSTALLER_URLS.keys())
-            }
-            zipf.writestr("metadata.json", json.dumps(metadata, indent=2))
-
-            for app, url in INSTALLER_URLS.items():
-                try:
-                    resp = requests.get(url, stream=True, timeout=30)
-                    if resp.status_code == 200:
-                        installer_name = os.path.basename(url.split("?")[0])
-                        installer_tmp = os.path.join(temp_dir, installer_name + ".part")
-
-                        with open(installer_tmp, "wb") as f:
-                            for chunk in resp.iter_content(1024 * 1024):
-                                f.write(chunk)
-
-                        final_path = installer_tmp[:-5]  # rename from .part → final
-                        os.rename(installer_tmp, final_path)
-                        zipf.write(final_path, arcname=installer_name)
-                    else:
-                        zipf.writestr(f"{app}_ERROR.txt", f"Failed to download (HTTP {resp.status_code}) from {url}\n")
-                except Exception as e:
-                    zipf.writestr(f"{app}_ERROR.txt", f"Download failed: {str(e)}\n")
-
-        # Use shutil to cleanup everything
-        def cleanup(path: str, folder: str):
-            if os.path.exists(path):
-                os.remove(path)
-            if os.path.exists(folder):
-                shutil.rmtree(folder, ignore_errors=True)
-
-        background_tasks.add_task(cleanup, zip_path, temp_dir)
+        build, future = BUILDS.start(installers, mode=mode, updates=updates)
+        await asyncio.wrap_future(future)
+        if build.status != "done":
+            BUILDS.remove(build.id)
+            return JSONResponse(status_code=500, content={"error": build.error})
+
+        background_tasks.add_task(BUILDS.remove, build.id)
 
         return FileResponse(
-            path=zip_path,
+            path=build.zip_path,
             filename="offline_update_package.zip",
             media_type="application/zip",
+            headers={"X-Build-Id": build.id},
         )
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.post("/offline-package/builds", tags=["Updates"], status_code=202)
+async def start_offline_package_build(mode: str = Query("full", pattern="^(full|delta)$")):
+    """Start a package build in the background and return its id for polling."""
+    installers, updates = await select_installers(mode)
+    build, _ = BUILDS.start(installers, mode=mode, updates=updates)
+    return build.to_dict()
+
+
+@app.get("/offline-package/builds/{build_id}", tags=["Updates"])
+async def offline_package_build_status(build_id: str):
+    build = BUILDS.get(build_id)
+    if build is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown build"})
+    return build.to_dict()
+
+
+@app.get("/offline-package/builds/{build_id}/download", tags=["Updates"])
+async def download_offline_package_build(build_id: str, background_tasks: BackgroundTasks):
+    build = BUILDS.get(build_id)
+    if build is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown build"})
+    if build.status != "done":
+        return JSONResponse(status_code=409, content={"error": f"Build is {build.status}"})
+
+    background_tasks.add_task(BUILDS.remove, build.id)
+    return FileResponse(
+        path=build.zip_path,
+        filename="offline_update_package.zip",
+        media_type="application/zip",
+    )
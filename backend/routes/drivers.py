@@ -0,0 +1,75 @@
+# backend/routes/drivers.py
+import platform
+from fastapi import APIRouter
+from utils.driver_scanner import DRIVER_SCANNER
+
+router = APIRouter()
+
+# Extended list of drivers we consider critical or common
+EXPECTED_DRIVERS = [
+    {"Driver Name": "nvlddmkm", "Device": "NVIDIA GPU"},
+    {"Driver Name": "rt640x64", "Device": "Realtek NIC"},
+    {"Driver Name": "iaStorA", "Device": "Intel Storage"},
+    {"Driver Name": "usbport", "Device": "USB Controller"},
+    {"Driver Name": "hidusb", "Device": "HID Device"},
+    {"Driver Name": "kbdhid", "Device": "Keyboard"},
+    {"Driver Name": "mouhid", "Device": "Mouse"},
+    {"Driver Name": "intelppm", "Device": "CPU Driver"},
+    {"Driver Name": "disk", "Device": "Disk Controller"},
+    {"Driver Name": "storahci", "Device": "AHCI Controller"},
+    {"Driver Name": "rt73", "Device": "Wi-Fi Adapter"},
+    {"Driver Name": "bthusb", "Device": "Bluetooth USB Adapter"},
+    {"Driver Name": "audiodg", "Device": "Audio Device"},
+    {"Driver Name": "ati2mtag", "Device": "AMD GPU"},
+    {"Driver Name": "nvlddmkm_win", "Device": "NVIDIA GPU"},
+    {"Driver Name": "netwtw06", "Device": "Intel Wireless"},
+    {"Driver Name": "btfilter", "Device": "Bluetooth Filter Driver"},
+    {"Driver Name": "e1d65x64", "Device": "Intel Ethernet"},
+    {"Driver Name": "rtwlane", "Device": "Realtek Wi-Fi"},
+    {"Driver Name": "iaahcic", "Device": "Intel AHCI Controller"},
+]
+
+# Kernel module equivalents for Linux hosts
+EXPECTED_LINUX_DRIVERS = [
+    {"Driver Name": "nvidia", "Device": "NVIDIA GPU"},
+    {"Driver Name": "amdgpu", "Device": "AMD GPU"},
+    {"Driver Name": "i915", "Device": "Intel GPU"},
+    {"Driver Name": "r8169", "Device": "Realtek NIC"},
+    {"Driver Name": "e1000e", "Device": "Intel Ethernet"},
+    {"Driver Name": "iwlwifi", "Device": "Intel Wireless"},
+    {"Driver Name": "ahci", "Device": "AHCI Controller"},
+    {"Driver Name": "nvme", "Device": "NVMe Controller"},
+    {"Driver Name": "sd_mod", "Device": "Disk Controller"},
+    {"Driver Name": "xhci_hcd", "Device": "USB Controller"},
+    {"Driver Name": "usbhid", "Device": "HID Device"},
+    {"Driver Name": "hid_generic", "Device": "Keyboard / Mouse"},
+    {"Driver Name": "btusb", "Device": "Bluetooth USB Adapter"},
+    {"Driver Name": "snd_hda_intel", "Device": "Audio Device"},
+]
+
+
+def expected_drivers() -> list:
+    return EXPECTED_DRIVERS if platform.system() == "Windows" else EXPECTED_LINUX_DRIVERS
+
+
+def scan_drivers() -> dict:
+    """Blocking driver scan; cached until module state changes (see utils/driver_scanner.py)."""
+    inventory = DRIVER_SCANNER.scan()
+
+    missing_drivers = [
+        {**driver, "Status": "Missing"}
+        for driver in expected_drivers()
+        if driver["Driver Name"] not in inventory  # set lookup
+    ]
+
+    return {
+        "missingDrivers": missing_drivers,
+        "installedDrivers": inventory.installed_rows(),
+        "availableDrivers": inventory.available_rows(),
+        "unboundDevices": inventory.unbound_rows(),
+    }
+
+
+@router.get("/drivers")
+def get_drivers():
+    return scan_drivers()
@@ -0,0 +1,78 @@
+# backend/routes/hosts.py
+from fastapi import APIRouter, Path, Query, Request
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from utils.fleet import FLEET, FLEET_CYCLER, MAX_INVENTORY_BYTES, InventoryTooLarge, parse_inventory
+
+router = APIRouter()
+
+HOST_ID = Path(..., pattern=r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+@router.post("/hosts/{host_id}/inventory", status_code=202)
+async def push_inventory(request: Request, host_id: str = HOST_ID):
+    """
+    Replace a host's inventory. Body: NDJSON lines of {"name", "version"},
+    optionally with `Content-Encoding: gzip` (what agent.py sends).
+    """
+    gzipped = "gzip" in request.headers.get("content-encoding", "").lower()
+    too_large = JSONResponse(status_code=413, content={"error": f"inventory exceeds {MAX_INVENTORY_BYTES} bytes"})
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > MAX_INVENTORY_BYTES:
+        return too_large
+
+    # The raw body is capped as it arrives; parse_inventory caps it again once decompressed
+    chunks, received = [], 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > MAX_INVENTORY_BYTES:
+            return too_large
+        chunks.append(chunk)
+    try:
+        apps = await run_in_threadpool(parse_inventory, chunks, gzipped)
+    except InventoryTooLarge as e:
+        return JSONResponse(status_code=413, content={"error": str(e)})
+    except (ValueError, UnicodeDecodeError, AttributeError) as e:
+        return JSONResponse(status_code=400, content={"error": f"invalid inventory: {e}"})
+
+    new_names = FLEET.ingest(host_id, apps)
+    if new_names:
+        FLEET_CYCLER.poke()  # resolve them in the next (debounced) cycle
+    return {"host": host_id, "apps": len(apps), "new_names": new_names, "cycle": FLEET.cycle}
+
+
+@router.get("/hosts")
+async def list_hosts():
+    return FLEET.summary()
+
+
+@router.get("/hosts/{host_id}/report")
+async def host_report(host_id: str = HOST_ID):
+    """The host's apps with latest versions from the most recent fleet-wide cycle."""
+    rows = FLEET.report(host_id)
+    if rows is None:
+        return JSONResponse(status_code=404, content={"error": f"unknown host {host_id}"})
+    return {"host": host_id, "cycle": FLEET.cycle, "apps": rows}
+
+
+@router.delete("/hosts/{host_id}")
+async def remove_host(host_id: str = HOST_ID):
+    if not FLEET.remove(host_id):
+        return JSONResponse(status_code=404, content={"error": f"unknown host {host_id}"})
+    return {"removed": host_id}
+
+
+@router.get("/fleet/apps")
+async def fleet_app_hosts(
+    name: str = Query(..., description="Installed app name, e.g. Node.js"),
+    below_latest: bool = Query(False, description="Only hosts with an update available"),
+):
+    """Fleet-wide query, e.g. /fleet/apps?name=Node.js&below_latest=true."""
+    return FLEET.hosts_with(name, below_latest=below_latest)
+
+
+@router.post("/fleet/resolve", status_code=202)
+async def resolve_fleet():
+    """Run a resolution cycle soon instead of waiting for the interval."""
+    FLEET_CYCLER.poke()
+    return {"scheduled": True, "cycle": FLEET.cycle}
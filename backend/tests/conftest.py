@@ -0,0 +1,40 @@
+# Tests run against the same local stand-ins as the benchmarks (bench/):
+# shell stubs for `winget` on PATH and a local HTTP registry/installer host.
+#
+#   cd backend && python -m pytest
+import os
+import tempfile
+
+# Module-level settings are read at import time: point all state at a scratch
+# directory and keep the tests off the network before anything is imported
+_STATE_DIR = tempfile.mkdtemp(prefix="backend_tests_")
+os.environ.update({
+    "OFFLINE_MODE": "off",
+    "VERSION_CACHE_BACKEND": "memory",
+    "SCAN_REFRESH_INTERVAL": "0",
+    "UNKNOWN_APPS_LOG": os.path.join(_STATE_DIR, "unknown_apps.log"),
+    "OFFLINE_CATALOG_PATH": os.path.join(_STATE_DIR, "catalog.db"),
+    "OFFLINE_DOWNLOAD_DIR": os.path.join(_STATE_DIR, "downloads"),
+    "INSTALLER_STORE_DIR": os.path.join(_STATE_DIR, "installers"),
+})
+
+import pytest  # noqa: E402
+
+from bench.stub_server import StubRegistry  # noqa: E402
+from utils.circuit_breaker import BREAKERS  # noqa: E402
+from utils.version_checker import CACHE  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    """Every test starts with an empty version cache and closed circuit breakers."""
+    CACHE.clear()
+    BREAKERS.clear()
+    yield
+
+
+@pytest.fixture(scope="session")
+def stub_registry():
+    stub = StubRegistry(latency=0, installer_bytes=256 * 1024).start()
+    yield stub
+    stub.shutdown()
@@ -0,0 +1,135 @@
+import os
+
+import pytest
+
+from bench.stub_server import StubRegistry
+from utils import downloader
+from utils.downloader import download_installer, part_name
+
+
+def installer_url(stub, name: str) -> str:
+    return f"{stub.url}/installers/{name}"
+
+
+def write_part(url: str, data: bytes, validator: str = None) -> str:
+    """Leave a .part behind as an interrupted download would."""
+    part_path = os.path.join(downloader.DOWNLOAD_DIR, part_name(url))
+    os.makedirs(downloader.DOWNLOAD_DIR, exist_ok=True)
+    with open(part_path, "wb") as f:
+        f.write(data)
+    if validator is not None:
+        with open(part_path + ".validator", "w", encoding="utf-8") as f:
+            f.write(validator)
+    return part_path
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt(done, total):
+    raise Interrupted()
+
+
+def test_full_download_returns_validators(stub_registry, tmp_path):
+    path, validators = download_installer(installer_url(stub_registry, "full.exe"), str(tmp_path))
+
+    assert path == str(tmp_path / "full.exe")
+    with open(path, "rb") as f:
+        assert f.read() == stub_registry.payload
+    assert validators["etag"] == stub_registry.installer_etag
+    assert not os.path.exists(os.path.join(downloader.DOWNLOAD_DIR, part_name(installer_url(stub_registry, "full.exe"))))
+
+
+def test_matching_etag_is_not_modified(stub_registry, tmp_path):
+    url = installer_url(stub_registry, "cached.exe")
+    _, validators = download_installer(url, str(tmp_path))
+    os.remove(tmp_path / "cached.exe")
+
+    path, again = download_installer(url, str(tmp_path), validators=validators)
+    assert path is None
+    assert again == validators
+    assert not os.path.exists(tmp_path / "cached.exe")
+
+
+def test_changed_etag_downloads_again(stub_registry, tmp_path):
+    url = installer_url(stub_registry, "changed.exe")
+    path, validators = download_installer(url, str(tmp_path), validators={"etag": '"stale"'})
+    assert path is not None
+    assert validators["etag"] == stub_registry.installer_etag
+
+
+def test_partial_download_resumes_with_range(stub_registry, tmp_path):
+    url = installer_url(stub_registry, "resume.exe")
+    have = len(stub_registry.payload) // 3
+    write_part(url, stub_registry.payload[:have], stub_registry.installer_etag)
+
+    seen = []
+    path, _ = download_installer(url, str(tmp_path), progress=lambda done, total: seen.append((done, total)))
+
+    with open(path, "rb") as f:
+        assert f.read() == stub_registry.payload
+    # Only the missing bytes came over the wire
+    assert seen[0][0] > have
+    assert seen[0][0] - have <= downloader.CHUNK_SIZE
+    assert seen[-1] == (len(stub_registry.payload), len(stub_registry.payload))
+
+
+def test_resume_skips_the_conditional_request(stub_registry, tmp_path):
+    """A partial .part is finished even when validators say it is current."""
+    url = installer_url(stub_registry, "resume-cond.exe")
+    write_part(url, stub_registry.payload[:1000], stub_registry.installer_etag)
+
+    path, _ = download_installer(url, str(tmp_path), validators={"etag": stub_registry.installer_etag})
+    with open(path, "rb") as f:
+        assert f.read() == stub_registry.payload
+
+
+def test_part_names_differ_for_urls_sharing_a_basename():
+    a = part_name("https://a.example.com/dl/setup.exe")
+    b = part_name("https://b.example.com/dl/setup.exe")
+    assert a != b
+    assert a.endswith("_setup.exe.part") and b.endswith("_setup.exe.part")
+    assert part_name("https://a.example.com/dl/setup.exe?x=1") != a
+
+
+def test_changed_upstream_restarts_instead_of_resuming(tmp_path, monkeypatch):
+    """A "latest" URL that moves to a new release between attempts must not splice old and new bytes."""
+    stub = StubRegistry(installer_bytes=256 * 1024).start()
+    try:
+        monkeypatch.setattr(downloader, "CHUNK_SIZE", 64 * 1024)
+        url = installer_url(stub, "latest.exe")
+        with pytest.raises(Interrupted):
+            download_installer(url, str(tmp_path), progress=interrupt)
+        assert os.path.getsize(os.path.join(downloader.DOWNLOAD_DIR, part_name(url))) == 64 * 1024
+
+        stub.set_payload(bytes(reversed(stub.payload)))
+        path, validators = download_installer(url, str(tmp_path))
+
+        with open(path, "rb") as f:
+            assert f.read() == stub.payload
+        assert validators["etag"] == stub.installer_etag
+    finally:
+        stub.shutdown()
+
+
+def test_interrupted_download_resumes_when_unchanged(stub_registry, tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, "CHUNK_SIZE", 64 * 1024)
+    url = installer_url(stub_registry, "interrupted.exe")
+    with pytest.raises(Interrupted):
+        download_installer(url, str(tmp_path), progress=interrupt)
+
+    seen = []
+    path, _ = download_installer(url, str(tmp_path), progress=lambda done, total: seen.append(done))
+    with open(path, "rb") as f:
+        assert f.read() == stub_registry.payload
+    assert seen[0] == 2 * 64 * 1024  # picked up after the first chunk
+
+
+def test_part_without_validator_starts_over(stub_registry, tmp_path):
+    url = installer_url(stub_registry, "orphan.exe")
+    write_part(url, b"x" * 1000)
+
+    path, _ = download_installer(url, str(tmp_path))
+    with open(path, "rb") as f:
+        assert f.read() == stub_registry.payload
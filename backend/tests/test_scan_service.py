@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from utils import scan_service
+from utils.scan_service import ScanPending, ScanService
+from utils.snapshots import Snapshot, SnapshotStore
+
+
+@pytest.fixture
+def slow_scan(monkeypatch):
+    """run_scan blocks until the test sets the returned event; no snapshot has completed yet."""
+    release = threading.Event()
+
+    def run_scan(deadline_ms=None):
+        release.wait(10)
+        return Snapshot({"Foo": "1.0"}, [{"name": "Foo", "latest": "2.0"}], {"Foo": time.time()})
+
+    monkeypatch.setattr(scan_service, "run_scan", run_scan)
+    monkeypatch.setattr(scan_service, "SNAPSHOTS", SnapshotStore())
+    yield release
+    release.set()
+
+
+def test_cold_start_join_honours_deadline(slow_scan):
+    async def scenario():
+        service = ScanService()
+        first = asyncio.ensure_future(service.scan())  # the scheduler's first scan
+        await asyncio.sleep(0)
+
+        started = time.perf_counter()
+        with pytest.raises(ScanPending):
+            await service.scan(deadline_ms=100)
+        waited = time.perf_counter() - started
+
+        slow_scan.set()
+        return waited, await first
+
+    waited, snapshot = asyncio.run(scenario())
+    assert waited < 1
+    assert snapshot.rows[0]["latest"] == "2.0"  # the running scan was not cancelled
+
+
+def test_join_after_first_scan_serves_latest(slow_scan):
+    previous = Snapshot({"Foo": "1.0"}, [{"name": "Foo", "latest": "1.5"}], {"Foo": time.time()})
+    scan_service.SNAPSHOTS.add(previous)
+
+    async def scenario():
+        service = ScanService()
+        first = asyncio.ensure_future(service.scan())
+        await asyncio.sleep(0)
+        joined = await service.scan(deadline_ms=100)
+        slow_scan.set()
+        await first
+        return joined
+
+    assert asyncio.run(scenario()) is previous
+
+
+def test_scan_endpoint_answers_503_during_first_scan(slow_scan):
+    with TestClient(main.app) as client:
+        first = threading.Thread(target=client.get, args=("/scan",))
+        first.start()
+        deadline = time.time() + 5
+        while not scan_service.SCAN_SERVICE.is_running() and time.time() < deadline:
+            time.sleep(0.01)
+
+        started = time.perf_counter()
+        resp = client.get("/scan?deadline_ms=100")
+        assert time.perf_counter() - started < 1
+        assert resp.status_code == 503
+        assert resp.headers["Retry-After"] == str(scan_service.SCAN_RETRY_AFTER)
+
+        slow_scan.set()
+        first.join(5)
@@ -0,0 +1,62 @@
+import pytest
+
+from utils.version_cache import MemoryCache, SQLiteCache
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    def make(max_entries, limit):
+        if request.param == "memory":
+            return MemoryCache(max_entries=max_entries, limit=limit)
+        return SQLiteCache(str(tmp_path / "versions.db"), max_entries=max_entries, limit=limit)
+    return make
+
+
+def fill(cache, n: int):
+    for i in range(n):
+        cache.set("pypi", f"pkg{i}", "1.0")
+    if isinstance(cache, SQLiteCache):
+        cache.evict()
+
+
+def held(cache, n: int) -> int:
+    return sum(1 for i in range(n) if cache.get("pypi", f"pkg{i}") is not None)
+
+
+def test_configured_size_is_the_floor(make_cache):
+    cache = make_cache(max_entries=100, limit=1000)
+    cache.reserve("scan", 10)
+    assert cache.max_entries == 100
+    fill(cache, 150)
+    assert held(cache, 150) == 100
+
+
+def test_reservation_keeps_a_whole_scan(make_cache):
+    cache = make_cache(max_entries=100, limit=1000)
+    cache.reserve("scan", 400)
+    fill(cache, 400)
+    assert held(cache, 400) == 400
+
+
+def test_reservations_never_exceed_the_limit(make_cache):
+    cache = make_cache(max_entries=100, limit=300)
+    cache.reserve("scan", 400)
+    cache.reserve("fleet", 400)
+    assert cache.max_entries == 300
+    fill(cache, 500)
+    assert held(cache, 500) == 300
+
+
+def test_reservations_add_up_and_shrink(make_cache):
+    cache = make_cache(max_entries=100, limit=1000)
+    cache.reserve("scan", 300)
+    cache.reserve("fleet", 200)
+    assert cache.max_entries == 500
+    cache.reserve("scan", 50)  # inventory got smaller
+    assert cache.max_entries == 250
+
+
+def test_limit_at_the_floor_disables_growth(make_cache):
+    cache = make_cache(max_entries=100, limit=100)
+    cache.reserve("scan", 10000)
+    assert cache.max_entries == 100
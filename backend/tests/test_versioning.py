@@ -0,0 +1,57 @@
+import pytest
+
+from utils.versioning import classify, compare, detect_scheme
+
+UPDATE, CURRENT = "Update Available ⚠️", "Up-to-date ✅"
+
+
+@pytest.mark.parametrize("version, scheme", [
+    ("1.4.0.0", "dotted"),
+    ("3.13.0rc1", "pep440"),
+    ("1:2.3.4-1ubuntu2", "debian"),
+    ("5.0~rc1", "debian"),
+    ("1.2-1+deb12u1", "debian"),
+])
+def test_detect_scheme(version, scheme):
+    assert detect_scheme(version) == scheme
+
+
+@pytest.mark.parametrize("current, latest, expected", [
+    ("1.4.0.0", "1.4", 0),
+    ("3.13.0rc1", "3.13.0", -1),
+    ("5.0~rc1", "5.0", -1),
+    ("2.3.4-1ubuntu2", "2.3.4-1ubuntu10", -1),
+    ("1:1.0-1", "2:0.5-1", -1),       # both sides have an epoch: it decides
+    ("2:1.0-1", "1:9.0-1", 1),
+    ("1:2:3-1", "1:2:4-1", -1),       # the epoch ends at the first colon
+])
+def test_compare(current, latest, expected):
+    assert compare(current, latest) == expected
+
+
+@pytest.mark.parametrize("current, latest, expected", [
+    ("1:2.3.4-1ubuntu2", "3.0.0", (UPDATE, "High 🔴")),
+    ("2:2.3.4-1", "2.4.0", (UPDATE, "Medium 🟠")),
+    ("1:2.3.4-1ubuntu2", "2.3.4", (CURRENT, "Low ✅")),   # Debian revision on the same upstream
+    ("3.0.0", "1:2.3.4-1ubuntu2", (CURRENT, "Low ✅")),
+    ("1:3.0.0-1", "3.0.0", (CURRENT, "Low ✅")),
+])
+def test_lone_epoch_is_ignored(current, latest, expected):
+    assert classify(current, latest) == expected
+
+
+def test_lone_epoch_compare_is_symmetric():
+    assert compare("1:2.3.4-1ubuntu2", "3.0.0") == -1
+    assert compare("3.0.0", "1:2.3.4-1ubuntu2") == 1
+
+
+@pytest.mark.parametrize("current, latest, expected", [
+    ("1.2.3", "2.0.0", (UPDATE, "High 🔴")),
+    ("1.2.3", "1.3.0", (UPDATE, "Medium 🟠")),
+    ("1.2.3", "1.2.4", (UPDATE, "Low ⚠️")),
+    ("1.3.0", "1.2.9", (CURRENT, "Low ✅")),
+    ("1.0", "Unknown", ("Unknown ❓", "Unknown ❓")),
+    ("1.0", "Pending", ("Pending ⏳", "Pending ⏳")),
+])
+def test_classify(current, latest, expected):
+    assert classify(current, latest) == expected
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from bench.fixtures import WINGET_LISTED, write_stubs
+from utils import version_checker
+from utils.metrics import SUBPROCESS_SPAWNS_TOTAL
+from utils.winget_index import WingetIndex, parse_winget_table
+
+
+def winget_spawns() -> float:
+    return SUBPROCESS_SPAWNS_TOTAL.value(command="winget")
+
+
+@pytest.fixture
+def winget(tmp_path, monkeypatch):
+    """`winget` stub on PATH and an empty index; returns the ids `winget show` knows."""
+    apps = [(f"libstub{i}", "1.0") for i in range(30)]
+    write_stubs(str(tmp_path / "bin"), str(tmp_path), apps, seed=7)
+    monkeypatch.setenv("PATH", str(tmp_path / "bin") + os.pathsep + os.environ["PATH"])
+    monkeypatch.setattr(version_checker, "WINGET_INDEX", WingetIndex(ttl=300))
+    with open(tmp_path / "winget-catalog.txt", encoding="utf-8") as f:
+        return dict(line.split() for line in f)
+
+
+def test_parse_table_takes_columns_from_header():
+    rows = parse_winget_table(
+        "\r-\r\\\rName     Id             Version  Available Source\n"
+        + "-" * 54 + "\n"
+        "Node.js  OpenJS.NodeJS  20.11.0  22.3.0    winget\n"
+        "1 upgrades available.\n"
+    )
+    assert rows == [{"name": "Node.js", "id": "OpenJS.NodeJS", "version": "20.11.0", "available": "22.3.0"}]
+
+
+def test_bulk_listing_answers_listed_ids_without_more_spawns(winget):
+    before = winget_spawns()
+    version_checker.refresh_winget_index()
+    assert winget_spawns() - before == 1
+
+    for name, app_id, version, available in WINGET_LISTED:
+        assert version_checker.check_winget(app_id) == (available or version)
+        assert version_checker.check_winget(name) == (available or version)  # display names too
+    assert winget_spawns() - before == 1
+
+
+def test_listing_is_reused_within_ttl(winget):
+    before = winget_spawns()
+    for _ in range(3):
+        version_checker.refresh_winget_index()
+    assert winget_spawns() - before == 1
+
+
+def test_ids_missing_from_listing_fall_back_to_winget_show(winget):
+    version_checker.refresh_winget_index()
+    app_id, latest = next(iter(winget.items()))
+    before = winget_spawns()
+
+    assert version_checker.check_winget(app_id) == latest
+    assert winget_spawns() - before == 1
+    # Cached: asking again spawns nothing
+    assert version_checker.check_winget(app_id) == latest
+    assert winget_spawns() - before == 1
+
+
+def test_unknown_ids_try_show_then_search(winget):
+    version_checker.refresh_winget_index()
+    before = winget_spawns()
+    assert version_checker.check_winget("No.Such.Package") == "Unknown"
+    assert winget_spawns() - before == 2
+
+
+def test_stale_index_is_not_consulted(winget):
+    version_checker.refresh_winget_index()
+    version_checker.WINGET_INDEX.loaded_at -= 301
+    assert version_checker.WINGET_INDEX.get("Google.Chrome") is None
@@ -0,0 +1,155 @@
+import re
+from collections import defaultdict
+
+# Tokens that carry no identity: trademark marks and bitness suffixes.
+# Architectures (x64/x86) are kept: some mappings differ only by them.
+NOISE_TOKENS = {"tm", "r", "c", "64", "32", "bit"}
+_SPLIT = re.compile(r"[^\w.+#-]+")
+_VERSION = re.compile(r"^v?\d+(?:\.\d+)*$")
+
+
+def tokenize(name: str) -> list:
+    """
+    Lower-case identity tokens of an app name:
+    "Java(TM) SE Development Kit 21.0.6 (64-bit)" -> ["java", "se", "development", "kit", "21.0.6"]
+    """
+    tokens = []
+    for raw in _SPLIT.split(name.lower()):
+        for token in raw.split("-") if not _VERSION.match(raw) else [raw]:
+            token = token.strip(".")
+            if token and token not in NOISE_TOKENS:
+                tokens.append(token)
+    return tokens
+
+
+def _version_prefixes(token: str) -> list:
+    """"8.0.10" -> ["8.0.10", "8.0", "8"]; other tokens only match themselves."""
+    if not _VERSION.match(token):
+        return [token]
+    parts = token.lstrip("v").split(".")
+    return [".".join(parts[:n]) for n in range(len(parts), 0, -1)]
+
+
+class Rule:
+    __slots__ = ("id", "kind", "pattern", "target", "confidence", "anchor", "regex")
+
+    def __init__(self, rule_id: str, kind: str, pattern: str, target: dict, confidence: float,
+                 anchor: str = None):
+        self.id = rule_id
+        self.kind = kind  # "exact", "prefix" or "regex"
+        self.pattern = pattern
+        self.target = target
+        self.confidence = confidence
+        self.anchor = anchor
+        self.regex = re.compile(pattern) if kind == "regex" else None
+
+
+class Match:
+    __slots__ = ("rule", "confidence", "specificity")
+
+    def __init__(self, rule: Rule, specificity: int = 0):
+        self.rule = rule
+        self.confidence = rule.confidence
+        self.specificity = specificity  # matched prefix length; breaks confidence ties
+
+    @property
+    def target(self) -> dict:
+        return self.rule.target
+
+    def to_dict(self) -> dict:
+        return {"rule": self.rule.id, "kind": self.rule.kind, "confidence": self.confidence}
+
+
+class AppMatcher:
+    """
+    Maps installed app names to lookup targets using rules compiled once:
+
+    - exact: normalized full name, one dict lookup
+    - prefix: token trie; version tokens match by dotted prefix, so
+      "Microsoft .NET Host - 8.0" matches "Microsoft .NET Host - 8.0.10 (x64)"
+    - regex: bucketed by an anchor token so only rules sharing a token with
+      the name are evaluated (unanchored regexes are checked for every name)
+
+    Lookup cost depends on the length of the name, not the number of rules.
+    """
+
+    def __init__(self):
+        self._exact = {}
+        self._trie = {}
+        self._anchored = defaultdict(list)
+        self._unanchored = []
+        self.rules = []
+
+    def add(self, rule: Rule):
+        self.rules.append(rule)
+        if rule.kind == "exact":
+            self._exact.setdefault(" ".join(tokenize(rule.pattern)), rule)
+        elif rule.kind == "prefix":
+            node = self._trie
+            for token in tokenize(rule.pattern):
+                node = node.setdefault(token, {})
+            node.setdefault(None, []).append(rule)
+        elif rule.anchor:
+            self._anchored[rule.anchor].append(rule)
+        else:
+            self._unanchored.append(rule)
+
+    def _prefix_matches(self, tokens: list) -> list:
+        found = []
+        nodes = [(self._trie, 0)]
+        while nodes:
+            node, depth = nodes.pop()
+            for rule in node.get(None, ()):
+                found.append(Match(rule, specificity=depth))
+            if depth < len(tokens):
+                for key in _version_prefixes(tokens[depth]):
+                    child = node.get(key)
+                    if child is not None:
+                        nodes.append((child, depth + 1))
+        return found
+
+    def candidates(self, name: str) -> list:
+        """Every matching rule for `name`, best first."""
+        tokens = tokenize(name)
+        found = []
+
+        exact = self._exact.get(" ".join(tokens))
+        if exact is not None:
+            found.append(Match(exact))
+
+        found.extend(self._prefix_matches(tokens))
+
+        seen = set()
+        for token in tokens:
+            for rule in self._anchored.get(token, ()):
+                if rule.id not in seen and rule.regex.search(name):
+                    seen.add(rule.id)
+                    found.append(Match(rule))
+        for rule in self._unanchored:
+            if rule.regex.search(name):
+                found.append(Match(rule))
+
+        found.sort(key=lambda m: (m.confidence, m.specificity), reverse=True)
+        return found
+
+    def match(self, name: str):
+        """Best match for `name`, or None."""
+        found = self.candidates(name)
+        return found[0] if found else None
+
+
+def compile_rules(mapping: dict, fallback_rules: list = ()) -> AppMatcher:
+    """
+    Build a matcher from an APP_NAME_MAPPING-style dict plus extra
+    (id, regex, anchor, target, confidence) fallback rules. Each mapping key
+    becomes an exact rule; keys of two or more tokens also become prefix
+    rules (single words like "pip" would prefix-match too much).
+    """
+    matcher = AppMatcher()
+    for name, target in mapping.items():
+        matcher.add(Rule(f"exact:{name}", "exact", name, target, 1.0))
+        if len(tokenize(name)) >= 2:
+            matcher.add(Rule(f"prefix:{name}", "prefix", name, target, 0.9))
+    for rule_id, pattern, anchor, target, confidence in fallback_rules:
+        matcher.add(Rule(rule_id, "regex", pattern, target, confidence, anchor=anchor))
+    return matcher
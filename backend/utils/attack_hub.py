@@ -0,0 +1,214 @@
+import asyncio
+import datetime
+import json
+import os
+import random
+import uuid
+
+# --- Broadcast settings (overridable via environment) ---
+CLIENT_QUEUE_SIZE = int(os.getenv("SIMULATION_CLIENT_QUEUE", "32"))  # events buffered per viewer
+HEARTBEAT_INTERVAL = float(os.getenv("SIMULATION_HEARTBEAT", "15"))  # seconds of silence before a comment
+RUN_RETENTION = float(os.getenv("SIMULATION_RETENTION", "120"))  # keep finished runs for resuming viewers
+IDLE_GRACE = float(os.getenv("SIMULATION_IDLE_GRACE", "10"))  # cancel a run this long after its last viewer left
+MAX_RUNS = int(os.getenv("SIMULATION_MAX_RUNS", "16"))  # simulations running at once
+STEP_DELAY = (0.6, 1.8)  # seconds between steps
+
+RETRY = b"retry: 2000\n\n"
+HEARTBEAT = b": keepalive\n\n"
+_LAGGED = -1  # queue marker: this viewer fell behind and must catch up from history
+_DONE = None
+
+
+class TooManyRuns(Exception):
+    """Raised when MAX_RUNS simulations are already running."""
+
+
+def now():
+    return datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def attack_steps(app_name: str) -> list:
+    return [
+        {"step": 1, "message": f"Reconnaissance started on {app_name}", "level": "INFO"},
+        {"step": 2, "message": "Scanning for open ports (80, 443, 8080)...", "level": "INFO"},
+        {"step": 3, "message": "Discovered service: HTTPS on 443 (TLS 1.2)", "level": "INFO"},
+        {"step": 4, "message": "Checking known CVEs... found CVE-2023-12345 vulnerability", "level": "WARN"},
+        {"step": 5, "message": "Injecting simulated exploit payload...", "level": "INFO"},
+        {"step": 6, "message": "Privilege escalation attempt with token reuse...", "level": "INFO"},
+        {"step": 7, "message": "Accessing /etc/shadow (SIMULATED)", "level": "INFO"},
+        {"step": 8, "message": f"Exfiltrating data to 185.199.{random.randint(0,255)}.{random.randint(0,255)}", "level": "INFO"},
+        {"step": 9, "message": "Hashing payload: " + hex(random.getrandbits(64)), "level": "INFO"},
+        {"step": 10, "message": "Simulation complete. Target compromised. (FAKE)", "level": "SUCCESS"},
+    ]
+
+
+class AttackRun:
+    """
+    One simulation timeline for an app, shared by every viewer.
+
+    Each event is serialized to SSE bytes exactly once, kept in `events`
+    (so late joiners and reconnecting clients can replay it) and pushed to
+    each viewer's bounded queue. A viewer whose queue overflows is not
+    allowed to hold up the others: its queue is reset to a single "lagged"
+    marker and it catches up from `events` on its own.
+
+    A run nobody watches is cancelled IDLE_GRACE seconds after its last
+    viewer left (long enough for an EventSource to reconnect and resume).
+    """
+
+    def __init__(self, app_name: str, idle_grace: float = IDLE_GRACE):
+        self.app_name = app_name
+        self.id = uuid.uuid4().hex[:12]
+        self.events = []
+        self.done = False
+        self.cancelled = False
+        self.idle_grace = idle_grace
+        self._viewers = 0
+        self._subscribers = set()
+        self._task = None
+
+    def start(self) -> asyncio.Task:
+        self._task = asyncio.create_task(self._produce())
+        self._watch_idle()  # the viewer that asked for it may never connect
+        return self._task
+
+    def _watch_idle(self):
+        asyncio.get_running_loop().call_later(self.idle_grace, self._cancel_if_idle)
+
+    def _cancel_if_idle(self):
+        if self._viewers == 0 and not self.done:
+            self.cancelled = True
+            self._task.cancel()
+
+    # --- Producer ---
+    def _publish(self, data: dict, event: str = None):
+        seq = len(self.events)
+        head = f"id: {self.id}:{seq}\n" + (f"event: {event}\n" if event else "")
+        self.events.append(f"{head}data: {json.dumps(data)}\n\n".encode("utf-8"))
+        self._broadcast((seq, self.events[seq]))
+
+    def _broadcast(self, item):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait((_LAGGED, None))
+
+    async def _produce(self):
+        steps = attack_steps(self.app_name)
+        try:
+            for step in steps:
+                self._publish({
+                    "timestamp": now(),
+                    "step": step["step"],
+                    "progress": int((step["step"] / len(steps)) * 100),
+                    "level": step["level"],
+                    "message": step["message"],
+                })
+                await asyncio.sleep(random.uniform(*STEP_DELAY))
+
+            self._publish({
+                "app": self.app_name,
+                "status": "Simulation finished",
+                "success": True,
+                "issues_found": ["CVE-2023-12345"],
+                "exfil_target": "185.199.x.x",
+            }, event="summary")
+            self._publish({"done": True}, event="end")
+        finally:
+            self.done = True
+            self._broadcast((_DONE, None))
+
+    # --- Viewers ---
+    async def stream(self, after: int = -1):
+        """SSE bytes for one viewer: history after event `after`, then live events with heartbeats."""
+        yield RETRY
+        self._viewers += 1
+        try:
+            async for chunk in self._follow(after):
+                yield chunk
+        finally:
+            self._viewers -= 1
+            if self._viewers == 0 and not self.done:
+                self._watch_idle()
+
+    async def _follow(self, after: int):
+        last = after
+        while True:
+            queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+            self._subscribers.add(queue)
+            try:
+                # Replay (join, resume or catch-up after lagging); anything newer arrives on the queue
+                for seq in range(last + 1, len(self.events)):
+                    yield self.events[seq]
+                    last = seq
+                if self.done and last >= len(self.events) - 1:
+                    return
+
+                while True:
+                    try:
+                        seq, data = await asyncio.wait_for(queue.get(), HEARTBEAT_INTERVAL)
+                    except asyncio.TimeoutError:
+                        yield HEARTBEAT
+                        continue
+                    if seq is _DONE:
+                        return
+                    if seq == _LAGGED:
+                        break
+                    if seq > last:
+                        yield data
+                        last = seq
+            finally:
+                self._subscribers.discard(queue)
+
+    @property
+    def viewers(self) -> int:
+        return self._viewers
+
+
+class AttackHub:
+    """The live (or recently finished) run per app name."""
+
+    def __init__(self, retention: float = RUN_RETENTION, max_runs: int = MAX_RUNS):
+        self.retention = retention
+        self.max_runs = max_runs
+        self._runs = {}
+
+    def join(self, app_name: str, last_event_id: str = None) -> tuple:
+        """
+        (run, after) for a new connection. A `Last-Event-ID` from the current
+        run resumes right after that event; otherwise the viewer joins the
+        running simulation from its first event, or starts a new one.
+        """
+        run = self._runs.get(app_name)
+        if run is not None and last_event_id:
+            run_id, _, seq = last_event_id.partition(":")
+            if run_id == run.id and seq.isdigit():
+                return run, int(seq)
+
+        if run is None or run.done:
+            running = sum(1 for r in self._runs.values() if not r.done)
+            if running >= self.max_runs:
+                raise TooManyRuns(f"{running} simulations already running")
+            run = AttackRun(app_name)
+            self._runs[app_name] = run
+            run.start().add_done_callback(lambda _: self._expire_later(app_name, run))
+        return run, -1
+
+    def _expire_later(self, app_name: str, run: AttackRun):
+        def expire():
+            if self._runs.get(app_name) is run:
+                del self._runs[app_name]
+        asyncio.get_running_loop().call_later(self.retention, expire)
+
+    def status(self) -> list:
+        return [
+            {"app": name, "run_id": run.id, "events": len(run.events), "viewers": run.viewers, "done": run.done,
+             "cancelled": run.cancelled}
+            for name, run in self._runs.items()
+        ]
+
+
+ATTACK_HUB = AttackHub()
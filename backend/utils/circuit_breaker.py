@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+
+# --- Breaker settings (overridable via environment) ---
+FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "60"))
+UNAVAILABLE_TIMEOUT = float(os.getenv("BREAKER_UNAVAILABLE_TIMEOUT", "600"))
+
+
+class BackendUnavailable(Exception):
+    """Raised by a backend that cannot work at all (e.g. its CLI is not installed)."""
+
+
+class CircuitBreaker:
+    """
+    Classic closed -> open -> half-open breaker.
+
+    - closed: calls go through; consecutive failures are counted.
+    - open: calls are refused until `reset_timeout` has passed.
+    - half-open: a single trial call decides whether to close or re-open.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.last_error = None
+        self._opened_at = 0.0
+        self._open_for = reset_timeout
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self._open_for:
+                self.state = "half-open"
+            if self.state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self, error: Exception):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)
+            self._trial_running = False
+            if isinstance(error, BackendUnavailable):
+                self._open(UNAVAILABLE_TIMEOUT)
+            elif self.state == "half-open" or self.failures >= self.failure_threshold:
+                self._open(self.reset_timeout)
+
+    def _open(self, duration: float):
+        if self.state != "open":
+            print(f"[circuit breaker] {self.name} opened for {int(duration)}s: {self.last_error}")
+        self.state = "open"
+        self._opened_at = time.monotonic()
+        self._open_for = duration
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "last_error": self.last_error,
+            }
+
+
+BREAKERS = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(backend: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if backend not in BREAKERS:
+            BREAKERS[backend] = CircuitBreaker(backend)
+        return BREAKERS[backend]
@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from packaging import version
+from utils.http_client import HTTP
+from utils.resolver import RESOLVER
+
+# --- Catalog settings (overridable via environment) ---
+DOTNET_INDEX_URL = os.getenv(
+    "DOTNET_INDEX_URL",
+    "https://dotnetcli.blob.core.windows.net/dotnet/release-metadata/releases-index.json",
+)
+CATALOG_TTL = int(os.getenv("DOTNET_CATALOG_TTL", str(6 * 3600)))
+
+# component name -> key used in each release entry of releases.json
+COMPONENTS = {
+    "runtime": "runtime",
+    "aspnetcore": "aspnetcore-runtime",
+    "windowsdesktop": "windowsdesktop",
+    "sdk": "sdk",
+}
+
+
+def latest_per_component(family_data: dict) -> dict:
+    """Highest non-preview version of every component in a releases.json document."""
+    table = {}
+    for component, key in COMPONENTS.items():
+        versions = [
+            rel[key]["version"]
+            for rel in family_data.get("releases", [])
+            if isinstance(rel.get(key), dict) and rel[key].get("version") and "-" not in rel[key]["version"]
+        ]
+        if versions:
+            table[component] = max(versions, key=version.parse)
+    return table
+
+
+class DotnetCatalog:
+    """
+    In-memory "latest runtime / aspnetcore / sdk per channel" table.
+
+    The releases index is fetched once; each channel's releases.json is
+    loaded the first time that channel is asked for. Entries older than
+    CATALOG_TTL are still served while a background refresh replaces them.
+    """
+
+    def __init__(self, index_url: str = DOTNET_INDEX_URL, ttl: int = CATALOG_TTL):
+        self.index_url = index_url
+        self.ttl = ttl
+        self._channels = {}  # channel -> releases.json URL
+        self._index_at = 0.0
+        self._tables = {}  # channel -> (component table, loaded_at)
+        self._lock = threading.Lock()
+
+    def _load_index(self):
+        index = HTTP.get_json(self.index_url)
+        channels = {r["channel-version"]: r["releases.json"] for r in index["releases-index"]}
+        with self._lock:
+            self._channels = channels
+            self._index_at = time.time()
+
+    def _load_channel(self, channel: str):
+        family_data = HTTP.get_json(self._channels[channel])
+        table = latest_per_component(family_data or {})
+        with self._lock:
+            self._tables[channel] = (table, time.time())
+
+    def _refresh_later(self, name: str, func):
+        RESOLVER.refresh("dotnet", f"catalog:{name}", lambda _: func())
+
+    def _resolve_channel(self, version_family: str):
+        if version_family in self._channels:
+            return version_family
+        for channel in self._channels:
+            if channel.startswith(version_family):
+                return channel
+        return None
+
+    def latest(self, version_family: str, component: str = "runtime"):
+        """Latest version of `component` for a channel like "8.0", or None."""
+        if not self._index_at:
+            # First use: concurrent callers share one index download
+            RESOLVER.lookup("dotnet", "catalog:index", lambda _: self._load_index())
+        elif time.time() - self._index_at >= self.ttl:
+            self._refresh_later("index", self._load_index)
+
+        channel = self._resolve_channel(version_family)
+        if channel is None:
+            return None
+
+        entry = self._tables.get(channel)
+        if entry is None:
+            # Identical concurrent first loads are coalesced by the resolver
+            RESOLVER.lookup("dotnet", f"catalog:{channel}", lambda _: self._load_channel(channel))
+            entry = self._tables.get(channel)
+        elif time.time() - entry[1] >= self.ttl:
+            self._refresh_later(channel, lambda: self._load_channel(channel))
+
+        return entry[0].get(component) if entry else None
+
+    def table(self) -> dict:
+        """Snapshot of everything loaded so far: {channel: {component: version}}."""
+        with self._lock:
+            return {channel: dict(table) for channel, (table, _) in self._tables.items()}
+
+
+DOTNET_CATALOG = DotnetCatalog()
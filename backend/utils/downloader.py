@@ -0,0 +1,165 @@
+import hashlib
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from utils.metrics import DOWNLOAD_BYTES_TOTAL, DOWNLOAD_SECONDS
+
+# --- Download settings (overridable via environment) ---
+DOWNLOAD_DIR = os.getenv(
+    "OFFLINE_DOWNLOAD_DIR",
+    str(Path(__file__).resolve().parent.parent / ".cache" / "downloads"),
+)
+DOWNLOAD_WORKERS = int(os.getenv("OFFLINE_DOWNLOAD_WORKERS", "4"))
+PER_HOST_LIMIT = int(os.getenv("OFFLINE_PER_HOST_LIMIT", "2"))
+DOWNLOAD_RETRIES = int(os.getenv("OFFLINE_DOWNLOAD_RETRIES", "3"))
+CHUNK_SIZE = 1024 * 1024
+
+
+# --- Pooled HTTP session ---
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max(PER_HOST_LIMIT, DOWNLOAD_WORKERS))
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
+_host_limits = {}
+_part_locks = {}
+_host_lock = threading.Lock()
+
+
+def host_semaphore(url: str) -> threading.BoundedSemaphore:
+    host = urlparse(url).netloc
+    with _host_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(PER_HOST_LIMIT)
+        return _host_limits[host]
+
+
+def _part_lock(name: str) -> threading.Lock:
+    with _host_lock:
+        return _part_locks.setdefault(name, threading.Lock())
+
+
+def installer_name(url: str) -> str:
+    return os.path.basename(url.split("?")[0])
+
+
+def part_name(url: str) -> str:
+    """Resume file for `url`: keyed by the whole URL, since different URLs can share a basename."""
+    return f"{hashlib.sha256(url.encode()).hexdigest()[:16]}_{installer_name(url)}.part"
+
+
+def download_installer(url: str, dest_dir: str, progress=None, validators: dict = None):
+    """
+    Download `url` into `dest_dir`.
+
+    Data goes to a .part file in DOWNLOAD_DIR first (see part_name); an
+    interrupted download resumes from the bytes already on disk with an
+    HTTP Range request. If-Range pins the resume to the ETag / Last-Modified
+    saved next to the .part, so a file that changed upstream starts over.
+    `progress(done, total)` is called as bytes arrive.
+
+    With `validators` ({"etag", "last_modified"} from an earlier download) the
+    request is conditional. Returns (path, validators), with path None when
+    the server answered 304 Not Modified.
+    """
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+    name = installer_name(url)
+    part_path = os.path.join(DOWNLOAD_DIR, part_name(url))
+
+    # Two builds fetching the same installer must not write the same .part
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        with _part_lock(part_path):
+            path, validators = _download_to(url, part_path, os.path.join(dest_dir, name), progress, validators)
+        outcome = "downloaded" if path else "not_modified"
+        return path, validators
+    finally:
+        DOWNLOAD_SECONDS.observe(time.perf_counter() - start, outcome=outcome)
+
+
+def _read_validator(part_path: str):
+    try:
+        with open(part_path + ".validator", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _write_validator(part_path: str, validator: str):
+    with open(part_path + ".validator", "w", encoding="utf-8") as f:
+        f.write(validator or "")
+
+
+def _discard_part(part_path: str):
+    for path in (part_path, part_path + ".validator"):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _download_to(url: str, part_path: str, final_path: str, progress=None, validators: dict = None):
+    last_error = None
+    for _attempt in range(DOWNLOAD_RETRIES):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if_range = _read_validator(part_path) if offset else None
+        if offset and not if_range:
+            _discard_part(part_path)  # nothing ties these bytes to the current upstream file
+            offset = 0
+        headers = {"Range": f"bytes={offset}-", "If-Range": if_range} if offset else {}
+        if validators and not offset:
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+        try:
+            with host_semaphore(url):
+                with SESSION.get(url, stream=True, timeout=30, headers=headers) as resp:
+                    if resp.status_code == 304:
+                        return None, validators
+                    if resp.status_code == 416:
+                        # Our .part is not a prefix of what the server has now; start over
+                        _discard_part(part_path)
+                        continue
+                    resp.raise_for_status()
+                    if resp.status_code != 206:
+                        offset = 0  # changed upstream (If-Range failed) or no Range support: full body
+                    length = resp.headers.get("Content-Length")
+                    total = offset + int(length) if length else None
+                    fresh_validators = {
+                        "etag": resp.headers.get("ETag"),
+                        "last_modified": resp.headers.get("Last-Modified"),
+                    }
+                    if not offset:
+                        # Weak ETags can't be used with If-Range
+                        etag = fresh_validators["etag"]
+                        strong_etag = etag if etag and not etag.startswith("W/") else None
+                        _write_validator(part_path, strong_etag or fresh_validators["last_modified"])
+
+                    done = offset
+                    with open(part_path, "ab" if offset else "wb") as f:
+                        for chunk in resp.iter_content(CHUNK_SIZE):
+                            f.write(chunk)
+                            done += len(chunk)
+                            DOWNLOAD_BYTES_TOTAL.inc(len(chunk))
+                            if progress:
+                                progress(done, total)
+
+            if total is not None and done < total:
+                raise IOError(f"connection closed at {done} of {total} bytes")
+
+            shutil.move(part_path, final_path)
+            _discard_part(part_path)
+            return final_path, fresh_validators
+        except requests.HTTPError:
+            raise
+        except (requests.RequestException, IOError) as e:
+            last_error = e  # keep the .part and resume on the next attempt
+    raise last_error or IOError(f"download failed: {url}")
@@ -0,0 +1,351 @@
+import fnmatch
+import hashlib
+import os
+import platform
+import re
+import subprocess
+import threading
+import time
+from utils.metrics import count_spawn
+
+# --- Kernel driver sources (overridable via environment) ---
+PROC_MODULES_PATH = os.getenv("PROC_MODULES_PATH", "/proc/modules")
+SYS_MODULE_DIR = os.getenv("SYS_MODULE_DIR", "/sys/module")
+SYS_BUS_DIR = os.getenv("SYS_BUS_DIR", "/sys/bus")
+KERNEL_MODULES_DIR = os.getenv("KERNEL_MODULES_DIR", os.path.join("/lib/modules", platform.release()))
+# Device (un)binding leaves no trace in /proc/modules; re-walk sysfs at least this often
+DRIVER_CACHE_TTL = float(os.getenv("DRIVER_CACHE_TTL", "30"))
+
+_MODULE_FILE = re.compile(r"\.ko(?:\.(?:xz|zst|gz))?$")
+
+
+def normalize_module(name: str) -> str:
+    """The kernel treats "-" and "_" in module names as the same character."""
+    return name.strip().lower().replace("-", "_")
+
+
+def normalize_windows_driver(name: str) -> str:
+    """Windows driver (.inf) names only differ by case."""
+    return name.strip().lower()
+
+
+def _stat_signature(path: str):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+# --- Loaded / built-in / available modules ---
+def iter_proc_modules(path: str = PROC_MODULES_PATH):
+    """
+    Yield one dict per loaded module from /proc/modules:
+    "name size refcount used_by, state address"
+    """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 5:
+                continue
+            used_by = [normalize_module(m) for m in parts[3].split(",") if m and m != "-"]
+            yield {
+                "name": normalize_module(parts[0]),
+                "size": int(parts[1]),
+                "refcount": int(parts[2]) if parts[2].isdigit() else 0,
+                "used_by": used_by,
+                "state": parts[4].lower(),
+            }
+
+
+def _module_file_names(path: str) -> set:
+    """Module names from a modules.builtin / modules.dep style file ("kernel/.../foo.ko[:deps]")."""
+    names = set()
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                module_path = line.split(":", 1)[0].strip()
+                if module_path:
+                    names.add(normalize_module(_MODULE_FILE.sub("", os.path.basename(module_path))))
+    except OSError:
+        pass
+    return names
+
+
+def read_builtin_modules(modules_dir: str = KERNEL_MODULES_DIR, sys_module_dir: str = SYS_MODULE_DIR) -> set:
+    """
+    Built-in modules: modules.builtin, plus /sys/module entries without an
+    initstate file (only loadable modules have one).
+    """
+    names = _module_file_names(os.path.join(modules_dir, "modules.builtin"))
+    try:
+        with os.scandir(sys_module_dir) as entries:
+            for entry in entries:
+                if not os.path.exists(os.path.join(entry.path, "initstate")):
+                    names.add(normalize_module(entry.name))
+    except OSError:
+        pass
+    return names
+
+
+class AliasIndex:
+    """
+    modules.alias patterns bucketed by their literal prefix up to the first
+    ":" (e.g. "pci", "usb", "acpi*"), so a device's modalias is only matched
+    against patterns for its own bus.
+    """
+
+    def __init__(self, path: str):
+        self.modules = set()
+        self._buckets = {}
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) != 3 or parts[0] != "alias":
+                        continue
+                    pattern, module = parts[1], normalize_module(parts[2])
+                    self.modules.add(module)
+                    bucket = pattern.split(":", 1)[0] if ":" in pattern else ""
+                    self._buckets.setdefault(bucket, []).append((pattern, module))
+        except OSError:
+            pass
+        self._compiled = {}
+
+    def _bucket(self, key: str) -> list:
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            compiled = [(re.compile(fnmatch.translate(p)), m) for p, m in self._buckets.get(key, ())]
+            self._compiled[key] = compiled
+        return compiled
+
+    def match(self, modalias: str) -> list:
+        """Modules whose alias patterns match a device's modalias string."""
+        bucket = modalias.split(":", 1)[0] if ":" in modalias else ""
+        found = []
+        for regex, module in self._bucket(bucket):
+            if module not in found and regex.match(modalias):
+                found.append(module)
+        return found
+
+
+def _read_text(path: str):
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _link_name(path: str):
+    try:
+        return os.path.basename(os.readlink(path))
+    except OSError:
+        return None
+
+
+def iter_device_bindings(bus_dir: str = SYS_BUS_DIR):
+    """
+    Yield {"bus", "device", "driver", "module", "modalias"} for every device
+    under /sys/bus/*/devices. "module" is the kernel module providing the
+    bound driver (None for built-in drivers without a module link).
+    """
+    try:
+        buses = sorted(os.listdir(bus_dir))
+    except OSError:
+        return
+    driver_modules = {}
+    for bus in buses:
+        devices_dir = os.path.join(bus_dir, bus, "devices")
+        try:
+            devices = sorted(os.listdir(devices_dir))
+        except OSError:
+            continue
+        for device in devices:
+            device_path = os.path.join(devices_dir, device)
+            driver = _link_name(os.path.join(device_path, "driver"))
+            module = None
+            if driver:
+                key = (bus, driver)
+                if key not in driver_modules:
+                    linked = _link_name(os.path.join(bus_dir, bus, "drivers", driver, "module"))
+                    driver_modules[key] = normalize_module(linked) if linked else None
+                module = driver_modules[key]
+            yield {
+                "bus": bus,
+                "device": device,
+                "driver": driver,
+                "module": module,
+                "modalias": _read_text(os.path.join(device_path, "modalias")),
+            }
+
+
+class DriverInventory:
+    """
+    One scan of the host's drivers plus a name index for expected-driver
+    checks. A driver counts as present when it is loaded, built in or bound
+    to a device; modules only installed on disk (`available`) do not.
+    """
+
+    def __init__(self, loaded: dict, builtin: set, available: set, devices: list,
+                 normalize=normalize_module):
+        self.loaded = loaded  # name -> /proc/modules entry
+        self.builtin = builtin
+        self.available = available  # installed on disk, not necessarily loaded
+        self.devices = devices
+        self.normalize = normalize
+        self.names = {normalize(name) for name in set(loaded) | builtin}
+        for device in devices:
+            for name in (device["driver"], device["module"]):
+                if name:
+                    self.names.add(normalize(name))
+
+    def __contains__(self, name: str) -> bool:
+        return self.normalize(name) in self.names
+
+    def installed_rows(self) -> list:
+        """Loaded and built-in drivers in the /drivers "installedDrivers" shape."""
+        bound = {}
+        for device in self.devices:
+            name = device["module"] or (self.normalize(device["driver"]) if device["driver"] else None)
+            if name:
+                bound.setdefault(name, []).append(f"{device['bus']}:{device['device']}")
+
+        rows = []
+        for name in sorted(set(self.loaded) | set(bound)):
+            status = self.loaded[name].get("status", "Loaded") if name in self.loaded else "Built-in"
+            rows.append({"Driver Name": name, "Device": ", ".join(bound.get(name, [])) or "Unknown", "Status": status})
+        return rows
+
+    def available_rows(self) -> list:
+        """Modules installed on disk but not loaded, in the /drivers "availableDrivers" shape."""
+        return [
+            {"Driver Name": name, "Device": "Unknown", "Status": "Available"}
+            for name in sorted(self.available - set(self.loaded) - self.builtin)
+        ]
+
+    def unbound_rows(self) -> list:
+        """Devices without a driver and the installed modules whose aliases match them."""
+        return [
+            {
+                "Device": f"{device['bus']}:{device['device']}",
+                "Modalias": device["modalias"],
+                "Candidates": device["candidates"],
+            }
+            for device in self.devices
+            if device["driver"] is None and device.get("candidates")
+        ]
+
+
+# --- Linux ---
+def _proc_modules_signature(path: str):
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class LinuxDriverScanner:
+    """
+    Cached Linux driver inventory. The cache is reused until /proc/modules
+    changes (load / unload / refcount), modules.alias / modules.dep /
+    modules.builtin change (kernel or driver package update), or
+    DRIVER_CACHE_TTL passes (device hotplug).
+    """
+
+    def __init__(self, proc_modules: str = PROC_MODULES_PATH, sys_module_dir: str = SYS_MODULE_DIR,
+                 bus_dir: str = SYS_BUS_DIR, modules_dir: str = KERNEL_MODULES_DIR, ttl: float = DRIVER_CACHE_TTL):
+        self.proc_modules = proc_modules
+        self.sys_module_dir = sys_module_dir
+        self.bus_dir = bus_dir
+        self.modules_dir = modules_dir
+        self.ttl = ttl
+        self._cached = None  # (signature, scanned_at, inventory)
+        self._aliases = None  # (signature, AliasIndex)
+        self._lock = threading.Lock()
+
+    def _signature(self):
+        return (
+            _proc_modules_signature(self.proc_modules),
+            tuple(_stat_signature(os.path.join(self.modules_dir, f))
+                  for f in ("modules.alias", "modules.dep", "modules.builtin")),
+        )
+
+    def _alias_index(self) -> AliasIndex:
+        path = os.path.join(self.modules_dir, "modules.alias")
+        sig = _stat_signature(path)
+        if self._aliases is None or self._aliases[0] != sig:
+            self._aliases = (sig, AliasIndex(path))
+        return self._aliases[1]
+
+    def scan(self) -> DriverInventory:
+        with self._lock:
+            sig = self._signature()
+            if self._cached and self._cached[0] == sig and time.time() - self._cached[1] < self.ttl:
+                return self._cached[2]
+
+            loaded = {}
+            if sig[0] is not None:
+                loaded = {m["name"]: m for m in iter_proc_modules(self.proc_modules)}
+            builtin = read_builtin_modules(self.modules_dir, self.sys_module_dir) - set(loaded)
+            aliases = self._alias_index()
+            available = aliases.modules | _module_file_names(os.path.join(self.modules_dir, "modules.dep"))
+
+            devices = []
+            for device in iter_device_bindings(self.bus_dir):
+                if device["driver"] is None and device["modalias"]:
+                    # Unbound device: which installed modules could drive it
+                    device["candidates"] = aliases.match(device["modalias"])
+                devices.append(device)
+
+            inventory = DriverInventory(loaded, builtin, available, devices)
+            self._cached = (sig, time.time(), inventory)
+            return inventory
+
+
+# --- Windows ---
+def scan_windows_drivers() -> DriverInventory:
+    """
+    Uses WMIC to get installed drivers on Windows (driver name = .inf file name).
+    """
+    installed = set()
+    try:
+        count_spawn("wmic")
+        result = subprocess.run(
+            ["wmic", "path", "win32_pnpsigneddriver", "get", "devicename,infname"],
+            capture_output=True,
+            text=True,
+        )
+        lines = result.stdout.strip().splitlines()[1:]  # skip header
+        for line in lines:
+            parts = line.split()
+            if len(parts) >= 2:
+                inf_name = parts[-1]  # usually the .inf file
+                installed.add(os.path.splitext(inf_name)[0])
+    except Exception as e:
+        print(f"Error scanning drivers: {e}")
+    return DriverInventory({name: {"name": name, "status": "Installed"} for name in installed}, set(), set(), [],
+                           normalize=normalize_windows_driver)
+
+
+class WindowsDriverScanner:
+    """WMIC is slow and has no change signal, so its result is reused for DRIVER_CACHE_TTL."""
+
+    def __init__(self, ttl: float = DRIVER_CACHE_TTL):
+        self.ttl = ttl
+        self._cached = None  # (scanned_at, inventory)
+        self._lock = threading.Lock()
+
+    def scan(self) -> DriverInventory:
+        with self._lock:
+            if self._cached is None or time.time() - self._cached[0] >= self.ttl:
+                self._cached = (time.time(), scan_windows_drivers())
+            return self._cached[1]
+
+
+def create_driver_scanner():
+    return WindowsDriverScanner() if platform.system() == "Windows" else LinuxDriverScanner()
+
+
+DRIVER_SCANNER = create_driver_scanner()
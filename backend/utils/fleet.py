@@ -0,0 +1,281 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import zlib
+from utils.offline_catalog import OFFLINE_MODE
+from utils.version_checker import CACHE, CACHE_ENTRIES_PER_APP, NEGATIVE_CACHE_TTL, refresh_winget_index, resolve_many
+from utils.versioning import classify, classify_many
+
+# --- Fleet settings (overridable via environment) ---
+FLEET_CYCLE_INTERVAL = float(os.getenv("FLEET_CYCLE_INTERVAL", "300"))  # seconds between resolution cycles
+FLEET_CYCLE_DEBOUNCE = float(os.getenv("FLEET_CYCLE_DEBOUNCE", "2"))  # batch pushes that arrive together
+FLEET_ROW_TTL = int(os.getenv("FLEET_ROW_TTL", "900"))  # re-resolve a name after this many seconds
+MAX_INVENTORY_BYTES = int(os.getenv("FLEET_MAX_INVENTORY_MB", "16")) * 1024 * 1024  # decompressed
+
+
+class InventoryTooLarge(ValueError):
+    """Raised when a pushed inventory exceeds MAX_INVENTORY_BYTES once decompressed."""
+
+
+def parse_inventory(chunks, gzipped: bool, max_bytes: int = MAX_INVENTORY_BYTES) -> dict:
+    """
+    {name: version} from an NDJSON body of {"name": ..., "version": ...} lines,
+    decompressing gzip incrementally and refusing oversized (or zip-bomb) bodies.
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+    apps, buffer, total = {}, b"", 0
+
+    def take(data: bytes):
+        nonlocal buffer, total
+        total += len(data)
+        if total > max_bytes:
+            raise InventoryTooLarge(f"inventory exceeds {max_bytes} bytes")
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            add(line)
+
+    def add(line: bytes):
+        if not line.strip():
+            return
+        entry = json.loads(line)
+        if entry.get("name"):
+            apps[str(entry["name"])] = str(entry.get("version") or "Unknown")
+
+    for chunk in chunks:
+        if decompressor is None:
+            take(chunk)
+            continue
+        data = decompressor.decompress(chunk, max_bytes + 1 - total)
+        take(data)
+        while decompressor.unconsumed_tail:
+            take(decompressor.decompress(decompressor.unconsumed_tail, max_bytes + 1 - total))
+    if decompressor is not None:
+        take(decompressor.flush())
+    add(buffer)
+    return apps
+
+
+class Host:
+    __slots__ = ("id", "apps", "received_at", "revision")
+
+    def __init__(self, host_id: str, apps: dict, revision: int):
+        self.id = host_id
+        self.apps = apps  # name -> installed version
+        self.received_at = time.time()
+        self.revision = revision
+
+
+class Fleet:
+    """
+    Inventories pushed by many hosts, resolved together.
+
+    Hosts share most of their app names, so a resolution cycle resolves each
+    unique name once, looking up each (backend, query) target those names
+    map to only once (see resolve_many), and every host's report is then
+    derived from that one table. A name -> {host: version}
+    index serves fleet-wide queries without walking every inventory.
+    """
+
+    def __init__(self):
+        self.hosts = {}
+        self.by_name = {}  # app name -> {host id: installed version}
+        self.latest = {}  # app name -> (latest, rule, resolved_at)
+        self.cycle = 0
+        self.last_cycle_at = None
+        self._revision = 0
+        self._reports = {}  # host id -> (revision, cycle, rows)
+        self._lock = threading.Lock()
+
+    # --- Ingestion ---
+    def ingest(self, host_id: str, apps: dict) -> int:
+        """Replace a host's inventory. Returns how many of its names the fleet has never resolved."""
+        with self._lock:
+            self._revision += 1
+            previous = self.hosts.get(host_id)
+            if previous is not None:
+                for name in previous.apps:
+                    holders = self.by_name.get(name)
+                    if holders is not None:
+                        holders.pop(host_id, None)
+                        if not holders:
+                            del self.by_name[name]
+            self.hosts[host_id] = Host(host_id, apps, self._revision)
+            for name, current in apps.items():
+                self.by_name.setdefault(name, {})[host_id] = current
+            return sum(1 for name in apps if name not in self.latest)
+
+    def remove(self, host_id: str) -> bool:
+        with self._lock:
+            host = self.hosts.pop(host_id, None)
+            if host is None:
+                return False
+            for name in host.apps:
+                holders = self.by_name.get(name, {})
+                holders.pop(host_id, None)
+                if not holders:
+                    self.by_name.pop(name, None)
+            self._reports.pop(host_id, None)
+            return True
+
+    # --- Resolution ---
+    def _due(self, now: float) -> list:
+        due = []
+        for name in self.by_name:
+            entry = self.latest.get(name)
+            if entry is None:
+                due.append(name)
+                continue
+            ttl = NEGATIVE_CACHE_TTL if entry[0] == "Unknown" else FLEET_ROW_TTL
+            if now - entry[2] >= ttl:
+                due.append(name)
+        return due
+
+    def run_cycle(self) -> dict:
+        """Resolve every unique name across all hosts that is new or expired (blocking)."""
+        started = time.time()
+        with self._lock:
+            names = self._due(started)
+            known = set(self.by_name)
+
+        if names:
+            CACHE.reserve("fleet", len(known) * CACHE_ENTRIES_PER_APP)  # every name across hosts, not just the due ones
+            if OFFLINE_MODE != "strict":
+                refresh_winget_index()
+            resolved = resolve_many(names)
+            now = time.time()
+            with self._lock:
+                for name, (latest, rule) in resolved.items():
+                    self.latest[name] = (latest, rule, now)
+
+        with self._lock:
+            # Names no host reports any more
+            for name in [n for n in self.latest if n not in known and n not in self.by_name]:
+                del self.latest[name]
+            self.cycle += 1
+            self.last_cycle_at = time.time()
+        return {"cycle": self.cycle, "resolved": len(names), "unique_names": len(known),
+                "seconds": round(time.time() - started, 3)}
+
+    # --- Reports and queries ---
+    def report(self, host_id: str):
+        """Result rows for one host, or None for an unknown host. Cached per inventory and cycle."""
+        with self._lock:
+            host = self.hosts.get(host_id)
+            if host is None:
+                return None
+            cached = self._reports.get(host_id)
+            if cached and cached[0] == host.revision and cached[1] == self.cycle:
+                return cached[2]
+            cycle = self.cycle
+            resolved = [
+                (name, current, *(self.latest.get(name) or ("Pending", None))[:2])
+                for name, current in host.apps.items()
+            ]
+
+        verdicts = classify_many((current, latest) for _, current, latest, _ in resolved)
+        rows = [
+            {"name": name, "current": current, "latest": latest, "status": status, "risk": risk, "rule": rule}
+            for (name, current, latest, rule), (status, risk) in zip(resolved, verdicts)
+        ]
+        with self._lock:
+            self._reports[host_id] = (host.revision, cycle, rows)
+        return rows
+
+    def hosts_with(self, name: str, below_latest: bool = False) -> dict:
+        """
+        Hosts reporting `name` (case-insensitive), e.g. every host running
+        Node.js below the latest release when `below_latest` is set.
+        """
+        wanted = name.lower()
+        with self._lock:
+            matches = {n: dict(holders) for n, holders in self.by_name.items() if n.lower() == wanted}
+            latest = {n: self.latest.get(n, ("Pending", None, 0))[0] for n in matches}
+
+        hosts = []
+        for app_name, holders in matches.items():
+            lat = latest[app_name]
+            for host_id, current in holders.items():
+                if below_latest:
+                    if lat in ("Unknown", "Pending") or classify(current, lat)[0] == "Up-to-date ✅":
+                        continue
+                hosts.append({"host": host_id, "name": app_name, "current": current, "latest": lat})
+        if below_latest:
+            hosts.sort(key=lambda h: h["host"])
+        return {"name": name, "latest": next(iter(latest.values()), None), "count": len(hosts), "hosts": hosts}
+
+    def summary(self) -> dict:
+        with self._lock:
+            hosts = [
+                {"host": h.id, "apps": len(h.apps), "received_at": h.received_at}
+                for h in self.hosts.values()
+            ]
+            return {
+                "hosts": len(hosts),
+                "unique_names": len(self.by_name),
+                "resolved_names": len(self.latest),
+                "cycle": self.cycle,
+                "last_cycle_at": self.last_cycle_at,
+                "host_list": sorted(hosts, key=lambda h: h["host"]),
+            }
+
+
+FLEET = Fleet()
+
+
+class FleetCycler:
+    """
+    Runs resolution cycles in the background: every FLEET_CYCLE_INTERVAL
+    seconds, and shortly after a push brings names the fleet hasn't seen
+    (debounced so a wave of agents reporting together costs one cycle).
+    """
+
+    def __init__(self, fleet: Fleet = FLEET, interval: float = FLEET_CYCLE_INTERVAL,
+                 debounce: float = FLEET_CYCLE_DEBOUNCE):
+        self.fleet = fleet
+        self.interval = interval
+        self.debounce = debounce
+        self.last_error = None
+        self._task = None
+        self._wake = None
+
+    def start(self):
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def poke(self):
+        """Ask for a cycle soon (new names arrived)."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+                await asyncio.sleep(self.debounce)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if not self.fleet.hosts:
+                continue
+            try:
+                await asyncio.to_thread(self.fleet.run_cycle)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"[fleet] Resolution cycle failed: {e}")
+
+
+FLEET_CYCLER = FleetCycler()
@@ -0,0 +1,172 @@
+import codecs
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- Registry endpoints and limits (overridable via environment) ---
+PYPI_URL = os.getenv("PYPI_URL", "https://pypi.org/pypi")
+NPM_REGISTRY_URL = os.getenv("NPM_REGISTRY_URL", "https://registry.npmjs.org")
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "5"))
+MAX_RESPONSE_BYTES = int(os.getenv("HTTP_MAX_RESPONSE_MB", "32")) * 1024 * 1024
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+DRAIN_MAX_BYTES = int(os.getenv("HTTP_DRAIN_MAX_MB", "4")) * 1024 * 1024  # unread body past this: drop the connection
+VALIDATOR_CACHE_SIZE = 2048  # URLs whose ETag + extracted value we remember
+CHUNK_SIZE = 64 * 1024
+
+
+class ResponseTooLarge(Exception):
+    """Raised when a registry response exceeds MAX_RESPONSE_BYTES."""
+
+
+def _iter_text(resp: requests.Response, max_bytes: int):
+    """Decode a streamed response to text chunk by chunk, enforcing the size cap."""
+    decoder = codecs.getincrementaldecoder(resp.encoding or "utf-8")(errors="replace")
+    received = 0
+    for chunk in resp.iter_content(CHUNK_SIZE):
+        received += len(chunk)
+        if received > max_bytes:
+            raise ResponseTooLarge(f"{resp.url} exceeded {max_bytes} bytes")
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def read_json(resp: requests.Response, max_bytes: int = MAX_RESPONSE_BYTES):
+    return json.loads("".join(_iter_text(resp, max_bytes)))
+
+
+_INFO_KEY = re.compile(r'"info"\s*:\s*')
+_STRUCTURE = re.compile(r'[{}"\\]')
+
+
+def _drain(resp: requests.Response, max_bytes: int = DRAIN_MAX_BYTES):
+    """
+    Read and discard the rest of a body so its keep-alive connection goes
+    back to the pool. Bodies with more than `max_bytes` left are cheaper to
+    abandon: the connection is closed instead.
+    """
+    length = resp.headers.get("Content-Length")
+    if length and int(length) > max_bytes:
+        return
+    received = 0
+    for chunk in resp.iter_content(CHUNK_SIZE):
+        received += len(chunk)
+        if received > max_bytes:
+            return
+
+
+def pypi_info_version(resp: requests.Response, max_bytes: int = MAX_RESPONSE_BYTES) -> str:
+    """
+    Pull `info.version` out of a PyPI /pypi/<pkg>/json response without
+    parsing the whole document. "info" is the first key and is small; the
+    bulk of the payload is the "releases" map that follows it. Each chunk is
+    scanned once for the brace that closes "info", which is then parsed on
+    its own; the rest of the body is drained so the connection is reused.
+    """
+    head, searched = "", 0
+    pieces = None  # text of the "info" object once its key has been seen
+    depth, in_string, skip = 0, False, None  # skip: offset of an escaped character in `piece`
+    for piece in _iter_text(resp, max_bytes):
+        if pieces is None:
+            head += piece  # "info" comes first, so this stays a few chunks long
+            match = _INFO_KEY.search(head, max(0, searched - 16))
+            searched = len(head)
+            if not match:
+                continue
+            pieces, piece = [], head[match.end():]
+
+        end = None
+        for token in _STRUCTURE.finditer(piece):
+            pos, char = token.start(), token.group()
+            if pos == skip:
+                continue
+            if in_string:
+                if char == "\\":
+                    skip = pos + 1
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    end = token.end()
+                    break
+        if end is None:
+            pieces.append(piece)
+            skip = 0 if skip == len(piece) else None
+            continue
+        pieces.append(piece[:end])
+        _drain(resp)
+        return json.loads("".join(pieces))["version"]
+    return json.loads(head)["info"]["version"]
+
+
+class RegistryClient:
+    """
+    Shared HTTP client for registry backends.
+
+    - one keep-alive connection pool for all lookups
+    - ETag / Last-Modified revalidation: unchanged documents come back as
+      304 and the previously extracted value is reused
+    - responses larger than MAX_RESPONSE_BYTES are refused
+    """
+
+    def __init__(self, pool_size: int = POOL_SIZE, max_bytes: int = MAX_RESPONSE_BYTES):
+        self.max_bytes = max_bytes
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._validators = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_json(self, url: str, extract=None):
+        """
+        GET a JSON document and return `extract(response)` (or the parsed
+        body when no extractor is given). Returns None on 404; raises on
+        transport errors and 5xx so circuit breakers can see them.
+        """
+        with self._lock:
+            cached = self._validators.get(url)
+            if cached is not None:
+                self._validators.move_to_end(url)
+
+        headers = {"Accept-Encoding": "gzip"}
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        with self.session.get(url, headers=headers, timeout=HTTP_TIMEOUT, stream=True) as resp:
+            if resp.status_code == 304 and cached is not None:
+                return cached[2]
+            if resp.status_code == 404:
+                return None
+            resp.raise_for_status()
+
+            length = resp.headers.get("Content-Length")
+            if length and int(length) > self.max_bytes:
+                raise ResponseTooLarge(f"{url} is {length} bytes")
+
+            value = extract(resp, self.max_bytes) if extract else read_json(resp, self.max_bytes)
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+
+        if etag or last_modified:
+            with self._lock:
+                self._validators[url] = (etag, last_modified, value)
+                while len(self._validators) > VALIDATOR_CACHE_SIZE:
+                    self._validators.popitem(last=False)
+        return value
+
+
+HTTP = RegistryClient()
@@ -0,0 +1,192 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from utils.downloader import download_installer
+
+# --- Store settings (overridable via environment) ---
+STORE_DIR = os.getenv(
+    "INSTALLER_STORE_DIR",
+    str(Path(__file__).resolve().parent.parent / ".cache" / "installers"),
+)
+STORE_QUOTA_BYTES = int(os.getenv("INSTALLER_STORE_QUOTA_MB", "20480")) * 1024 * 1024
+REVALIDATE_AFTER = int(os.getenv("INSTALLER_REVALIDATE_AFTER", "300"))  # skip the 304 round trip this long
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class InstallerStore:
+    """
+    Content-addressed installer cache: blobs live at blobs/<ab>/<sha256>,
+    and an SQLite index maps each URL to its current blob plus the ETag /
+    Last-Modified validators used to revalidate it. Blobs are evicted
+    least-recently-used once the store exceeds its quota.
+
+    Every blob returned by `fetch` is leased to the caller and is never
+    evicted until the caller hands it back with `release`.
+    """
+
+    def __init__(self, root: str = STORE_DIR, quota_bytes: int = STORE_QUOTA_BYTES):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self._lock = threading.Lock()
+        self._leases = Counter()  # sha256 -> holders; guarded by _lock, same as eviction
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                " sha256 TEXT PRIMARY KEY, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS urls ("
+                " url TEXT PRIMARY KEY, sha256 TEXT NOT NULL, etag TEXT, last_modified TEXT,"
+                " validated_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        """Connection that commits on success and is always closed."""
+        conn = sqlite3.connect(os.path.join(self.root, "index.db"), timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.root, "blobs", sha256[:2], sha256)
+
+    def fetch(self, url: str, progress=None) -> dict:
+        """
+        Return {"sha256", "size", "path"} for the installer at `url`, using the
+        stored blob when the server confirms it is unchanged (304).
+        The blob is leased: call `release(sha256)` once done with its path.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT sha256, etag, last_modified, validated_at FROM urls WHERE url = ?", (url,)
+            ).fetchone()
+
+        leased = row[0] if row and self._lease(row[0]) else None
+        if leased:
+            if time.time() - row[3] < REVALIDATE_AFTER:
+                return self._touch(url, leased, validated=False)
+            validators = {"etag": row[1], "last_modified": row[2]}
+        else:
+            validators = None
+
+        staging = tempfile.mkdtemp(dir=self.root, prefix="staging_")
+        try:
+            try:
+                path, validators = download_installer(url, staging, progress, validators)
+            except BaseException:
+                if leased:
+                    self.release(leased)
+                raise
+            if path is None:
+                return self._touch(url, leased, validated=True)
+            if leased:
+                self.release(leased)  # changed upstream; the new blob gets its own lease
+            return self._ingest(url, path, validators)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def _lease(self, sha256: str) -> bool:
+        """Take a lease on a stored blob; False if it is no longer on disk."""
+        with self._lock:
+            if not os.path.exists(self.blob_path(sha256)):
+                return False
+            self._leases[sha256] += 1
+            return True
+
+    def release(self, sha256: str):
+        """Give back a lease taken by `fetch`; the blob becomes evictable again."""
+        with self._lock:
+            self._leases[sha256] -= 1
+            if self._leases[sha256] <= 0:
+                del self._leases[sha256]
+
+    def _touch(self, url: str, sha256: str, validated: bool) -> dict:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("UPDATE blobs SET last_access = ? WHERE sha256 = ?", (now, sha256))
+            if validated:
+                conn.execute("UPDATE urls SET validated_at = ? WHERE url = ?", (now, url))
+            size = conn.execute("SELECT size FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()[0]
+        return {"sha256": sha256, "size": size, "path": self.blob_path(sha256)}
+
+    def _ingest(self, url: str, path: str, validators: dict) -> dict:
+        sha256 = sha256_file(path)
+        size = os.path.getsize(path)
+        dest = self.blob_path(sha256)
+        with self._lock:
+            self._leases[sha256] += 1  # before the blob is visible, so eviction never sees it unleased
+        try:
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            if os.path.exists(dest):
+                os.remove(path)  # same bytes already stored (e.g. another URL)
+            else:
+                os.replace(path, dest)
+
+            now = time.time()
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO blobs (sha256, size, last_access) VALUES (?, ?, ?)",
+                    (sha256, size, now),
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO urls (url, sha256, etag, last_modified, validated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (url, sha256, validators.get("etag"), validators.get("last_modified"), now),
+                )
+        except BaseException:
+            self.release(sha256)
+            raise
+        self.evict()
+        return {"sha256": sha256, "size": size, "path": dest}
+
+    def evict(self):
+        """Delete least-recently-used blobs until the store fits its quota; leased blobs are kept."""
+        with self._lock, self._connect() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            if total <= self.quota_bytes:
+                return
+            for sha256, size in conn.execute(
+                "SELECT sha256, size FROM blobs ORDER BY last_access ASC"
+            ).fetchall():
+                if total <= self.quota_bytes:
+                    break
+                if self._leases[sha256] > 0:
+                    continue
+                try:
+                    os.remove(self.blob_path(sha256))
+                except FileNotFoundError:
+                    pass
+                conn.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+                conn.execute("DELETE FROM urls WHERE sha256 = ?", (sha256,))
+                total -= size
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> InstallerStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = InstallerStore()
+        return _store
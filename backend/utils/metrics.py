@@ -0,0 +1,210 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds: sub-millisecond cache hits up to slow registry calls and full scans
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> list:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def snapshot(self) -> dict:
+        """{label values: count} for every series so far."""
+        with self._lock:
+            return dict(self._values)
+
+    def _samples(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(v)}" for key, v in items]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> list:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-2] + [0]):
+                cumulative += count
+                if bound == float("inf"):
+                    cumulative = series[-1]
+                le = 'le="{}"'.format(_number(bound) if bound != float("inf") else "+Inf")
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(float(series[-2]))}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    """Every metric defined below, rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# --- Scan pipeline ---
+SCAN_STAGE_SECONDS = REGISTRY.register(Histogram(
+    "scan_stage_seconds", "Time spent in each scan pipeline stage.", ("stage",)))
+BACKEND_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "backend_request_seconds", "Latest-version lookups against each backend.", ("backend", "outcome")))
+VERSION_CACHE_TOTAL = REGISTRY.register(Counter(
+    "version_cache_total", "Version cache lookups by result (hit, stale, miss).", ("backend", "result")))
+SUBPROCESS_SPAWNS_TOTAL = REGISTRY.register(Counter(
+    "subprocess_spawns_total", "External commands started.", ("command",)))
+
+# --- Offline packages ---
+DOWNLOAD_BYTES_TOTAL = REGISTRY.register(Counter(
+    "installer_download_bytes_total", "Installer bytes received from upstream servers."))
+DOWNLOAD_SECONDS = REGISTRY.register(Histogram(
+    "installer_download_seconds", "Installer download duration.", ("outcome",)))
+
+# --- HTTP ---
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "http_request_seconds", "API request latency.", ("method", "route", "status")))
+HTTP_REQUEST_STAGE_SECONDS = REGISTRY.register(Histogram(
+    "http_request_stage_seconds", "Time spent in each stage of an API request.", ("route", "stage")))
+
+
+def count_spawn(args) -> None:
+    """Record one subprocess start, labelled by executable name."""
+    command = args[0] if isinstance(args, (list, tuple)) else str(args).split()[0]
+    SUBPROCESS_SPAWNS_TOTAL.inc(command=str(command).replace("\\", "/").rsplit("/", 1)[-1].lower())
+
+
+class StageTimer:
+    """
+    Collects named durations for one scan or request (for Server-Timing) and
+    feeds them to a histogram with a "stage" label: SCAN_STAGE_SECONDS for
+    the scan pipeline, HTTP_REQUEST_STAGE_SECONDS (with a route) for requests.
+    """
+
+    def __init__(self, histogram: Histogram = None, **labels):
+        self.histogram = histogram or SCAN_STAGE_SECONDS
+        self.labels = labels
+        self.stages = {}
+
+    def _record(self, name: str, elapsed: float):
+        self.stages[name] = self.stages.get(name, 0.0) + elapsed
+        self.histogram.observe(elapsed, stage=name, **self.labels)
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, time.perf_counter() - start)
+
+    def iterate(self, name: str, iterable):
+        """Yield from `iterable`, timing only how long each item takes to produce (not the consumer)."""
+        elapsed = 0.0
+        iterator = iter(iterable)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - start
+                yield item
+        finally:
+            self._record(name, elapsed)
+
+
+def server_timing(stages: dict, prefix: str = "") -> str:
+    """`Server-Timing` header value from {name: seconds}."""
+    return ", ".join(f"{prefix}{name};dur={seconds * 1000:.1f}" for name, seconds in stages.items())
@@ -0,0 +1,269 @@
+# Offline version catalog: a local SQLite index of latest versions, so
+# air-gapped hosts can resolve apps without any registry access.
+#
+# Import a registry dump (JSON map, JSON list, JSON lines or CSV of name/version):
+#   python -m utils.offline_catalog import pypi pypi-latest.jsonl
+#   python -m utils.offline_catalog import name latest_versions.json
+#   python -m utils.offline_catalog stats
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from utils.app_matcher import tokenize
+from utils.versioning import compare
+
+# --- Catalog settings (overridable via environment) ---
+CATALOG_PATH = os.getenv(
+    "OFFLINE_CATALOG_PATH",
+    str(Path(__file__).resolve().parent.parent / ".cache" / "catalog.db"),
+)
+# Display-name -> latest map shipped with the repo; re-imported whenever it changes
+LATEST_VERSIONS_PATH = os.getenv(
+    "LATEST_VERSIONS_PATH",
+    str(Path(__file__).resolve().parent.parent / "latest_versions.json"),
+)
+# "off": never consult the catalog; "prefer": catalog first, then the network;
+# "strict": catalog only, nothing ever touches the network.
+# Rows from LATEST_VERSIONS_PATH are sample data: in "prefer" mode they are
+# only a last resort when the network has no answer (see lookup_seed).
+OFFLINE_MODE = os.getenv("OFFLINE_MODE", "prefer").lower()
+BACKENDS = ("name", "pypi", "npm", "winget", "dotnet")
+SEED_SOURCE = "seed"
+LOOKUP_BATCH = 500  # bound parameters per IN (...) query
+
+_PYPI_SEPARATORS = re.compile(r"[-_.]+")
+
+
+def catalog_key(backend: str, name: str) -> str:
+    """Normalized lookup key, so "Python 3.13 (64-bit)" and "python 3.13" collide."""
+    if backend == "name":
+        return " ".join(tokenize(name))
+    if backend == "pypi":
+        return _PYPI_SEPARATORS.sub("-", name).lower()  # PEP 503
+    return name.strip().lower()
+
+
+# --- Dump readers: each yields (name, version) ---
+def iter_json(path: str):
+    """{"name": "version", ...} or [{"name": ..., "version": ...}, ...]."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        yield from data.items()
+    else:
+        for entry in data:
+            yield entry.get("name") or entry.get("id"), entry.get("version") or entry.get("latest")
+
+
+def iter_jsonl(path: str):
+    """One {"name"/"id": ..., "version"/"latest": ...} object per line."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            yield entry.get("name") or entry.get("id"), entry.get("version") or entry.get("latest")
+
+
+def iter_csv(path: str):
+    """name,version rows; a header row is skipped if present."""
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.reader(f):
+            if len(row) >= 2 and row[0].strip().lower() not in ("name", "id"):
+                yield row[0], row[1]
+
+
+def reader_for(path: str):
+    if path.endswith((".jsonl", ".ndjson")):
+        return iter_jsonl
+    if path.endswith(".csv"):
+        return iter_csv
+    return iter_json
+
+
+class OfflineCatalog:
+    """
+    name -> latest version index in SQLite (WITHOUT ROWID primary-key
+    lookups, memory-mapped reads). Opening is instant regardless of size, so
+    there is no cold-load cost; lookups are single B-tree probes.
+
+    Each row remembers the source it was imported from, so re-importing a
+    source replaces everything that source provided.
+    """
+
+    def __init__(self, path: str = CATALOG_PATH, seed_path: str = LATEST_VERSIONS_PATH):
+        self.path = path
+        self.seed_path = seed_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._ready = False
+        self._disabled = False
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA mmap_size=268435456")
+            self._local.conn = conn
+        return conn
+
+    def _ensure_ready(self) -> bool:
+        if self._ready or self._disabled:
+            return self._ready
+        with self._lock:
+            if self._ready or self._disabled:
+                return self._ready
+            try:
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                conn = self._conn()
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS catalog ("
+                    " backend TEXT NOT NULL, name TEXT NOT NULL, latest TEXT NOT NULL,"
+                    " source TEXT NOT NULL DEFAULT 'import',"
+                    " PRIMARY KEY (backend, name)) WITHOUT ROWID"
+                )
+                conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+                if "source" not in {col[1] for col in conn.execute("PRAGMA table_info(catalog)")}:
+                    # Catalogs from before sources were tracked: re-import the seed so its rows get labelled
+                    conn.execute("ALTER TABLE catalog ADD COLUMN source TEXT NOT NULL DEFAULT 'import'")
+                    conn.execute("DELETE FROM meta WHERE key LIKE 'seed:%'")
+                conn.commit()
+                self._ready = True
+                self._import_seed()
+            except (sqlite3.Error, OSError) as e:
+                print(f"[offline catalog] unavailable at {self.path}: {e}")
+                self._disabled = True
+        return self._ready
+
+    def _import_seed(self):
+        """(Re-)import latest_versions.json when it changed since the last import."""
+        try:
+            st = os.stat(self.seed_path)
+        except OSError:
+            return
+        stamp = f"{st.st_mtime_ns}:{st.st_size}"
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (f"seed:{self.seed_path}",)).fetchone()
+        if row and row[0] == stamp:
+            return
+        try:
+            self.import_records("name", iter_json(self.seed_path), source=SEED_SOURCE)
+        except (OSError, ValueError) as e:
+            print(f"[offline catalog] could not import {self.seed_path}: {e}")
+            return
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (f"seed:{self.seed_path}", stamp))
+        conn.commit()
+
+    def import_records(self, backend: str, records, source: str = "import") -> int:
+        """
+        Bulk-load (name, version) pairs in one transaction, replacing whatever
+        `source` imported into `backend` before (names gone from the source
+        are dropped). When a dump lists several versions of the same name,
+        the highest one wins.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+        if not self._ensure_ready():
+            raise RuntimeError(f"offline catalog unavailable at {self.path}")
+        best = {}
+        for name, latest in records:
+            if not name or not latest:
+                continue
+            key, latest = catalog_key(backend, str(name)), str(latest).strip()
+            current = best.get(key)
+            if current is None or compare(current, latest) < 0:
+                best[key] = latest
+
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM catalog WHERE backend = ? AND source = ?", (backend, source))
+            conn.executemany(
+                "INSERT OR REPLACE INTO catalog (backend, name, latest, source) VALUES (?, ?, ?, ?)",
+                ((backend, key, latest, source) for key, latest in best.items()),
+            )
+        return len(best)
+
+    def import_file(self, backend: str, path: str) -> int:
+        return self.import_records(backend, reader_for(path)(path), source=os.path.abspath(path))
+
+    def _source_filter(self) -> str:
+        """Seed rows answer first only in strict mode; in prefer mode the network comes before them."""
+        return f" AND source != '{SEED_SOURCE}'" if OFFLINE_MODE == "prefer" else ""
+
+    def lookup(self, backend: str, name: str):
+        """Latest version for one name, or None."""
+        if OFFLINE_MODE == "off" or not self._ensure_ready():
+            return None
+        row = self._conn().execute(
+            "SELECT latest FROM catalog WHERE backend = ? AND name = ?" + self._source_filter(),
+            (backend, catalog_key(backend, name)),
+        ).fetchone()
+        return row[0] if row else None
+
+    def lookup_seed(self, name: str):
+        """Latest version from the LATEST_VERSIONS_PATH sample data only: the fallback when nothing else answered."""
+        if OFFLINE_MODE == "off" or not self._ensure_ready():
+            return None
+        row = self._conn().execute(
+            "SELECT latest FROM catalog WHERE backend = 'name' AND name = ? AND source = ?",
+            (catalog_key("name", name), SEED_SOURCE),
+        ).fetchone()
+        return row[0] if row else None
+
+    def lookup_many(self, backend: str, names) -> dict:
+        """{name: latest} for every name the catalog knows, in batched queries."""
+        if OFFLINE_MODE == "off" or not self._ensure_ready():
+            return {}
+        keys = {}
+        for name in names:
+            keys.setdefault(catalog_key(backend, name), []).append(name)
+        found = {}
+        key_list = list(keys)
+        conn = self._conn()
+        for start in range(0, len(key_list), LOOKUP_BATCH):
+            batch = key_list[start:start + LOOKUP_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            for key, latest in conn.execute(
+                f"SELECT name, latest FROM catalog WHERE backend = ? AND name IN ({placeholders})"
+                + self._source_filter(),
+                (backend, *batch),
+            ):
+                for name in keys[key]:
+                    found[name] = latest
+        return found
+
+    def stats(self) -> dict:
+        if not self._ensure_ready():
+            return {}
+        return dict(self._conn().execute("SELECT backend, COUNT(*) FROM catalog GROUP BY backend").fetchall())
+
+
+OFFLINE_CATALOG = OfflineCatalog()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.offline_catalog", description="Manage the offline version catalog.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="bulk-import a registry dump")
+    imp.add_argument("backend", choices=BACKENDS, help='"name" for installed-app display names')
+    imp.add_argument("paths", nargs="+", help="JSON map/list, JSON lines (.jsonl) or CSV (.csv)")
+    sub.add_parser("stats", help="entries per backend")
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        for path in args.paths:
+            print(f"{path}: {OFFLINE_CATALOG.import_file(args.backend, path)} entries")
+    print(json.dumps(OFFLINE_CATALOG.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
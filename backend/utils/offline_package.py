@@ -0,0 +1,364 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from utils.downloader import CHUNK_SIZE, DOWNLOAD_RETRIES, DOWNLOAD_WORKERS, host_semaphore, SESSION, installer_name
+from utils.installer_store import get_store
+from utils.version_checker import MATCHER
+
+# --- Build settings (overridable via environment) ---
+BUILD_WORKERS = int(os.getenv("OFFLINE_BUILD_WORKERS", "2"))
+BUILD_HISTORY = 16  # finished builds kept for status/download
+STREAM_PREFETCH = int(os.getenv("OFFLINE_STREAM_PREFETCH", "2"))  # responses opened ahead while streaming
+
+
+class PackageBuild:
+    """State and progress of one offline package build."""
+
+    def __init__(self, installers: dict, mode: str = "full", updates: list = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.installers = dict(installers)
+        self.mode = mode
+        self.updates = updates or []
+        self.status = "queued"
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.temp_dir = tempfile.mkdtemp(prefix="offline_pkg_")
+        self.zip_path = os.path.join(self.temp_dir, f"offline_update_{int(self.created_at)}.zip")
+        self.files = {
+            app: {"url": url, "status": "pending", "bytes": 0, "total": None, "error": None}
+            for app, url in self.installers.items()
+        }
+        self._lock = threading.Lock()
+
+    def _progress(self, app: str):
+        def update(done, total):
+            with self._lock:
+                self.files[app].update(bytes=done, total=total, status="downloading")
+        return update
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            files = {app: dict(info) for app, info in self.files.items()}
+        done = sum(f["bytes"] for f in files.values())
+        totals = [f["total"] for f in files.values()]
+        total = sum(totals) if all(t is not None for t in totals) else None
+        elapsed = (self.finished_at or time.time()) - self.created_at
+        return {
+            "id": self.id,
+            "mode": self.mode,
+            "status": self.status,
+            "error": self.error,
+            "bytes_downloaded": done,
+            "bytes_total": total,
+            "percent": round(done * 100 / total, 1) if total else None,
+            "throughput_bps": int(done / elapsed) if elapsed > 0 else 0,
+            "files": files,
+        }
+
+    def run(self):
+        self.status = "downloading"
+        stored = {}
+        try:
+            store = get_store()
+
+            def fetch(item):
+                app, url = item
+                try:
+                    blob = store.fetch(url, self._progress(app))  # leased until the zip is written
+                    with self._lock:
+                        stored[app] = blob
+                        self.files[app].update(status="done", bytes=blob["size"], total=blob["size"])
+                except Exception as e:
+                    with self._lock:
+                        self.files[app].update(status="failed", error=str(e))
+
+            with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as pool:
+                list(pool.map(fetch, self.installers.items()))
+
+            self.status = "packaging"
+            with zipfile.ZipFile(self.zip_path, "w") as zipf:
+                # Metadata, with a hash per installer so the package can be verified offline
+                metadata = {
+                    "generated_at": time.ctime(self.created_at),
+                    "mode": self.mode,
+                    "included_apps": list(self.installers.keys()),
+                    "files": {
+                        installer_name(self.installers[app]): {
+                            "app": app,
+                            "sha256": blob["sha256"],
+                            "size": blob["size"],
+                        }
+                        for app, blob in stored.items()
+                    },
+                }
+                if self.mode == "delta":
+                    metadata["updates"] = self.updates
+                zipf.writestr("metadata.json", json.dumps(metadata, indent=2))
+
+                for app, url in self.installers.items():
+                    if app in stored:
+                        zipf.write(stored[app]["path"], arcname=installer_name(url))
+                    else:
+                        zipf.writestr(f"{app}_ERROR.txt", f"Download failed: {self.files[app]['error']} ({url})\n")
+
+            self.status = "done"
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+        finally:
+            for blob in stored.values():
+                store.release(blob["sha256"])
+            self.finished_at = time.time()
+
+    def cleanup(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+class BuildManager:
+    """Runs package builds on a bounded pool and remembers recent ones."""
+
+    def __init__(self, workers: int = BUILD_WORKERS, history: int = BUILD_HISTORY):
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="offline-build")
+        self._builds = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, installers: dict, mode: str = "full", updates: list = None):
+        """Queue a build; returns (build, concurrent future)."""
+        build = PackageBuild(installers, mode=mode, updates=updates)
+        with self._lock:
+            self._builds[build.id] = build
+            # Queued and running builds are kept even past the history limit
+            finished = [b for b in self._builds.values() if b.status in ("done", "failed")]
+            for old in finished[:max(0, len(self._builds) - self.history)]:
+                del self._builds[old.id]
+                old.cleanup()
+        return build, self._executor.submit(build.run)
+
+    def get(self, build_id: str):
+        with self._lock:
+            return self._builds.get(build_id)
+
+    def remove(self, build_id: str):
+        with self._lock:
+            build = self._builds.pop(build_id, None)
+        if build is not None:
+            build.cleanup()
+
+
+BUILDS = BuildManager()
+
+
+# --- Delta packages ---
+def _target_key(target: dict) -> tuple:
+    """What an installer updates: .NET by family (runtime, host and ASP.NET Core share one), else the lookup id."""
+    if target["type"] == "dotnet":
+        return ("dotnet", target["version_family"])
+    return (target["type"], target.get("query") or target.get("version"))
+
+
+def _row_target(row: dict):
+    """The mapping target that resolved a scanned row (its recorded rule), else the best match."""
+    candidates = MATCHER.candidates(row["name"])
+    for match in candidates:
+        if match.rule.id == row.get("rule"):
+            return match.target
+    return candidates[0].target if candidates else None
+
+
+def installers_for_updates(rows: list, installers: dict) -> tuple:
+    """
+    Pick the installers for apps whose status is "Update Available".
+
+    Installer keys and scanned names both go through the resolver's
+    APP_NAME_MAPPING rules, so "Microsoft .NET Runtime - 8.0" is chosen for
+    "Microsoft ASP.NET Core 8.0" and "Python 3" for
+    "Python 3.13.3 Core Interpreter (64-bit)". Returns (installers, rows).
+    """
+    keys = {}
+    for key in installers:
+        match = MATCHER.match(key)
+        if match is not None:
+            keys.setdefault(_target_key(match.target), key)
+
+    selected, updates = {}, []
+    for row in rows:
+        if not row["status"].startswith("Update Available"):
+            continue
+        target = _row_target(row)
+        key = keys.get(_target_key(target)) if target else None
+        if key is not None and key not in selected:
+            selected[key] = installers[key]
+            updates.append({**row, "installer": key})
+    return selected, updates
+
+
+# --- Streaming zip ---
+class _ZipSink(io.RawIOBase):
+    """Write-only, non-seekable sink; zipfile then emits data descriptors."""
+
+    def __init__(self):
+        self._buf = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._buf += b
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = bytes(self._buf)
+        self._buf.clear()
+        return data
+
+
+def _open_installer(url: str):
+    """GET `url` in one of its host's download slots; the slot stays taken until `_release`."""
+    semaphore = host_semaphore(url)
+    semaphore.acquire()
+    resp = None
+    try:
+        resp = SESSION.get(url, stream=True, timeout=30)
+        resp.raise_for_status()
+        return resp
+    except BaseException:
+        if resp is not None:
+            resp.close()
+        semaphore.release()
+        raise
+
+
+def _release(url: str, resp):
+    resp.close()
+    host_semaphore(url).release()
+
+
+def _discard(url: str):
+    """Done-callback for a prefetched response that will never be read."""
+    def callback(future):
+        if not future.cancelled() and future.exception() is None:
+            _release(url, future.result())
+    return callback
+
+
+def _iter_body(url: str, resp):
+    """
+    Chunks of an installer body. A connection that drops partway is resumed
+    with a Range request (If-Range pins it to the same ETag / Last-Modified)
+    up to DOWNLOAD_RETRIES times; after that the error is raised.
+    """
+    length = resp.headers.get("Content-Length")
+    total = int(length) if length else None
+    validator = resp.headers.get("ETag") or resp.headers.get("Last-Modified")
+    done, attempts, current = 0, 0, resp
+    try:
+        while True:
+            try:
+                for chunk in current.iter_content(CHUNK_SIZE):
+                    done += len(chunk)
+                    yield chunk
+                if total is not None and done < total:
+                    raise IOError(f"connection closed at {done} of {total} bytes")
+                return
+            except (requests.RequestException, IOError):
+                attempts += 1
+                if not validator or attempts >= DOWNLOAD_RETRIES:
+                    raise
+            if current is not resp:
+                current.close()
+            current = SESSION.get(url, stream=True, timeout=30,
+                                  headers={"Range": f"bytes={done}-", "If-Range": validator})
+            if current.status_code != 206:
+                raise IOError(f"cannot resume at {done} bytes (HTTP {current.status_code})")
+    finally:
+        if current is not resp:
+            current.close()
+
+
+def stream_package(installers: dict):
+    """
+    Yield an offline package zip chunk by chunk while the installers download.
+
+    Installer bytes go straight from the HTTP response into the zip entry, so
+    nothing touches disk and memory stays at about one chunk per installer
+    being read. The next STREAM_PREFETCH responses are opened ahead of time
+    so their connections are ready when their entry starts; each response
+    holds its host's download slot until its body has been read.
+
+    An installer that fails before its first byte gets an `<app>_ERROR.txt`
+    entry instead. One that still fails partway after resuming cannot be
+    taken back out of the bytes already sent, so the stream is aborted rather
+    than finished with a truncated installer in it.
+
+    Full packages only: delta packages list per-file hashes in their
+    metadata.json, which needs every installer before the first byte.
+    """
+    sink = _ZipSink()
+    items = list(installers.items())
+    opening = []  # (future response, url), in entry order
+    consumed = 0
+    # One opener thread takes host slots in entry order; parallel openers could
+    # grab a later entry's slot first and leave the current one waiting forever
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        try:
+            with zipfile.ZipFile(sink, "w") as zipf:
+                metadata = {
+                    "generated_at": time.ctime(),
+                    "included_apps": list(installers.keys())
+                }
+                zipf.writestr("metadata.json", json.dumps(metadata, indent=2))
+                yield sink.drain()
+
+                opening = [(pool.submit(_open_installer, url), url) for _, url in items[:STREAM_PREFETCH]]
+                for i, (app, url) in enumerate(items):
+                    if i + STREAM_PREFETCH < len(items):
+                        ahead = items[i + STREAM_PREFETCH][1]
+                        opening.append((pool.submit(_open_installer, ahead), ahead))
+                    future, _ = opening[i]
+                    consumed = i + 1
+
+                    resp = None
+                    try:
+                        resp = future.result()
+                        chunks = _iter_body(url, resp)
+                        first = next(chunks, b"")
+                    except Exception as e:
+                        if resp is not None:
+                            _release(url, resp)
+                        zipf.writestr(f"{app}_ERROR.txt", f"Download failed (not included): {e} ({url})\n")
+                        yield sink.drain()
+                        continue
+
+                    try:
+                        with zipf.open(installer_name(url), "w", force_zip64=True) as entry:
+                            entry.write(first)
+                            yield sink.drain()
+                            for chunk in chunks:
+                                entry.write(chunk)
+                                yield sink.drain()
+                    except Exception as e:
+                        print(f"[offline] Aborting streamed package: {app} failed partway: {e}")
+                        raise
+                    finally:
+                        chunks.close()
+                        _release(url, resp)
+                    yield sink.drain()
+
+            yield sink.drain()  # central directory
+        finally:
+            # Client gone or stream aborted: close what was opened ahead and free its host slots
+            for future, url in opening[consumed:]:
+                future.cancel()
+                future.add_done_callback(_discard(url))
@@ -0,0 +1,164 @@
+import mmap
+import os
+import sqlite3
+import struct
+import threading
+
+# --- Package database locations (overridable via environment) ---
+DPKG_STATUS_PATH = os.getenv("DPKG_STATUS_PATH", "/var/lib/dpkg/status")
+APK_INSTALLED_PATH = os.getenv("APK_INSTALLED_PATH", "/lib/apk/db/installed")
+RPM_DB_PATHS = [
+    os.getenv("RPM_DB_PATH", "/var/lib/rpm/rpmdb.sqlite"),
+    "/usr/lib/sysimage/rpm/rpmdb.sqlite",
+]
+
+
+def _iter_lines(path: str):
+    """Yield raw lines (bytes, without newline) from a memory-mapped file."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b""):
+                yield line.rstrip(b"\r\n")
+
+
+# --- dpkg (Debian / Ubuntu) ---
+def iter_dpkg_status(path: str = DPKG_STATUS_PATH):
+    """
+    Stream (name, version) for every installed package in a dpkg status file.
+    Stanzas are separated by blank lines; only the fields we need are decoded.
+    """
+    name = ver = status = None
+    for line in _iter_lines(path):
+        if not line:
+            if name and ver and status and status.split()[-1] == "installed":
+                yield name, ver
+            name = ver = status = None
+        elif line.startswith(b"Package: "):
+            name = line[9:].decode("utf-8", "replace").strip()
+        elif line.startswith(b"Version: "):
+            ver = line[9:].decode("utf-8", "replace").strip()
+        elif line.startswith(b"Status: "):
+            status = line[8:].decode("ascii", "replace").strip()
+    if name and ver and status and status.split()[-1] == "installed":
+        yield name, ver
+
+
+# --- apk (Alpine) ---
+def iter_apk_installed(path: str = APK_INSTALLED_PATH):
+    """Stream (name, version) from apk's installed database (`P:` / `V:` records)."""
+    name = ver = None
+    for line in _iter_lines(path):
+        if not line:
+            if name and ver:
+                yield name, ver
+            name = ver = None
+        elif line.startswith(b"P:"):
+            name = line[2:].decode("utf-8", "replace")
+        elif line.startswith(b"V:"):
+            ver = line[2:].decode("utf-8", "replace")
+    if name and ver:
+        yield name, ver
+
+
+# --- rpm (Fedora / RHEL / SUSE) ---
+RPMTAG_NAME = 1000
+RPMTAG_VERSION = 1001
+RPMTAG_RELEASE = 1002
+RPMTAG_EPOCH = 1003
+RPM_INT32_TYPE = 4
+RPM_STRING_TYPE = 6
+
+
+def parse_rpm_header(blob: bytes) -> dict:
+    """
+    Pull name/version/release/epoch out of an RPM header blob as stored in
+    rpmdb.sqlite: index count and data length (big-endian int32), then
+    16-byte index entries (tag, type, offset, count), then the data store.
+    """
+    index_count, data_len = struct.unpack_from(">ii", blob, 0)
+    data_start = 8 + index_count * 16
+    wanted = (RPMTAG_NAME, RPMTAG_VERSION, RPMTAG_RELEASE, RPMTAG_EPOCH)
+    fields = {}
+    for i in range(index_count):
+        tag, typ, offset, _count = struct.unpack_from(">iiii", blob, 8 + i * 16)
+        if tag not in wanted:
+            continue
+        pos = data_start + offset
+        if typ == RPM_STRING_TYPE:
+            end = blob.index(b"\0", pos)
+            fields[tag] = blob[pos:end].decode("utf-8", "replace")
+        elif typ == RPM_INT32_TYPE:
+            fields[tag] = struct.unpack_from(">i", blob, pos)[0]
+    return fields
+
+
+def iter_rpm_sqlite(path: str):
+    """Stream (name, "[epoch:]version-release") from an rpmdb.sqlite database."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        for (blob,) in conn.execute("SELECT blob FROM Packages"):
+            fields = parse_rpm_header(bytes(blob))
+            name = fields.get(RPMTAG_NAME)
+            if not name or name == "gpg-pubkey":
+                continue
+            ver = fields.get(RPMTAG_VERSION, "")
+            if fields.get(RPMTAG_RELEASE):
+                ver = f"{ver}-{fields[RPMTAG_RELEASE]}"
+            if fields.get(RPMTAG_EPOCH):
+                ver = f"{fields[RPMTAG_EPOCH]}:{ver}"
+            yield name, ver
+    finally:
+        conn.close()
+
+
+# --- Cached loading ---
+_PARSE_CACHE = {}
+_cache_lock = threading.Lock()
+
+
+def _signature(path: str) -> tuple:
+    """(mtime, size) of the database plus its SQLite WAL, if any."""
+    sig = []
+    for p in (path, path + "-wal"):
+        try:
+            st = os.stat(p)
+            sig.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            sig.append(None)
+    return tuple(sig)
+
+
+def load_packages(path: str, parser) -> list:
+    """
+    Parse a package database into a list of (name, version) tuples.
+    The result is reused until the file's mtime or size changes.
+    """
+    sig = _signature(path)
+    with _cache_lock:
+        cached = _PARSE_CACHE.get(path)
+        if cached and cached[0] == sig:
+            return cached[1]
+
+    records = list(parser(path))
+    with _cache_lock:
+        _PARSE_CACHE[path] = (sig, records)
+    return records
+
+
+def scan_linux_packages():
+    """
+    Read the first native package database present on this host.
+    Returns a list of (name, version) tuples, or None if none was found.
+    """
+    sources = [(DPKG_STATUS_PATH, iter_dpkg_status), (APK_INSTALLED_PATH, iter_apk_installed)]
+    sources += [(path, iter_rpm_sqlite) for path in RPM_DB_PATHS]
+
+    for path, parser in sources:
+        if os.path.isfile(path):
+            try:
+                return load_packages(path, parser)
+            except (OSError, ValueError, struct.error, sqlite3.Error) as e:
+                print(f"Package database error ({path}): {e}")
+    return None
@@ -0,0 +1,127 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+
+# --- Concurrency settings (overridable via environment) ---
+MAX_WORKERS = int(os.getenv("RESOLVER_MAX_WORKERS", "16"))
+
+BACKEND_LIMITS = {
+    "winget": int(os.getenv("RESOLVER_WINGET_LIMIT", "4")),
+    "pypi": int(os.getenv("RESOLVER_PYPI_LIMIT", "8")),
+    "npm": int(os.getenv("RESOLVER_NPM_LIMIT", "8")),
+    "dotnet": int(os.getenv("RESOLVER_DOTNET_LIMIT", "2")),
+}
+DEFAULT_BACKEND_LIMIT = 4
+REFRESH_WORKERS = int(os.getenv("RESOLVER_REFRESH_WORKERS", "4"))
+
+
+class Resolver:
+    """
+    Runs version lookups concurrently.
+
+    - `map` fans work out over a bounded worker pool and keeps input order.
+    - `lookup` limits how many calls hit each backend at once and coalesces
+      identical in-flight (backend, query) lookups into a single call.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, backend_limits: dict = None):
+        self.max_workers = max(1, max_workers)
+        self._limits = {
+            name: threading.BoundedSemaphore(max(1, limit))
+            for name, limit in (backend_limits or BACKEND_LIMITS).items()
+        }
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._refresher = None
+
+    def _semaphore(self, backend: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if backend not in self._limits:
+                self._limits[backend] = threading.BoundedSemaphore(DEFAULT_BACKEND_LIMIT)
+            return self._limits[backend]
+
+    def lookup(self, backend: str, query: str, fetch_func):
+        key = (backend, query)
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+
+        # Someone else is already fetching this exact query -> wait for it
+        if not owner:
+            return future.result()
+
+        try:
+            with self._semaphore(backend):
+                value = fetch_func(query)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def refresh(self, backend: str, query: str, fetch_func):
+        """Re-fetch in the background unless the same lookup is already running."""
+        with self._lock:
+            if (backend, query) in self._inflight:
+                return
+            if self._refresher is None:
+                self._refresher = ThreadPoolExecutor(
+                    max_workers=REFRESH_WORKERS, thread_name_prefix="version-refresh"
+                )
+            refresher = self._refresher
+
+        def run():
+            try:
+                self.lookup(backend, query, fetch_func)
+            except Exception as e:
+                print(f"[resolver] Background refresh failed for {backend}:{query}: {e}")
+
+        refresher.submit(run)
+
+    def map(self, func, items, timeout: float = None, default=None) -> list:
+        """
+        Apply `func` to every item concurrently, keeping input order.
+        With `timeout`, items not finished in time get `default(item)` instead;
+        their work is left running so it can still populate caches.
+        """
+        items = list(items)
+        if timeout is None and (self.max_workers == 1 or len(items) <= 1):
+            return [func(item) for item in items]
+        if not items:
+            return []
+
+        pool = ThreadPoolExecutor(max_workers=min(self.max_workers, len(items)))
+        try:
+            futures = [pool.submit(func, item) for item in items]
+            wait(futures, timeout=timeout)
+            return [
+                future.result() if future.done() else default(item)
+                for future, item in zip(futures, items)
+            ]
+        finally:
+            pool.shutdown(wait=timeout is None)
+
+    def iter_completed(self, func, items):
+        """Like `map`, but yield each result as soon as it finishes (completion order)."""
+        items = list(items)
+        if not items:
+            return
+
+        pool = ThreadPoolExecutor(max_workers=min(self.max_workers, len(items)))
+        try:
+            futures = [pool.submit(func, item) for item in items]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # Consumer went away early (e.g. client disconnected): drop queued work
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+RESOLVER = Resolver()
@@ -0,0 +1,127 @@
+import base64
+import binascii
+import re
+import threading
+from collections import OrderedDict
+
+# --- Query settings ---
+MAX_PAGE_LIMIT = 1000
+RESULT_CACHE_SIZE = 32  # distinct filter/sort combinations kept per snapshot
+
+# Ranks used for sorting; unknown labels sort last
+STATUS_RANK = {"update-available": 0, "unknown": 1, "pending": 2, "up-to-date": 3}
+RISK_RANK = {"high": 0, "medium": 1, "low": 2, "unknown": 3, "pending": 4}
+SORT_FIELDS = ("name", "status", "risk")
+
+_LABEL_WORDS = re.compile(r"[a-z]+(?:-[a-z]+)*")
+
+
+class InvalidQuery(ValueError):
+    """Raised for unknown sort fields, filter values or malformed cursors."""
+
+
+def label_key(label: str) -> str:
+    """Status/risk labels without emoji: "Update Available ⚠️" -> "update-available", "High 🔴" -> "high"."""
+    return "-".join(_LABEL_WORDS.findall((label or "").lower().replace(" ", "-"))) or "unknown"
+
+
+def _split_values(value: str, known: dict, param: str) -> set:
+    wanted = {label_key(v) for v in value.split(",") if v.strip()}
+    unknown = wanted - set(known)
+    if unknown:
+        raise InvalidQuery(f"unknown {param} value(s): {', '.join(sorted(unknown))}")
+    return wanted
+
+
+def encode_cursor(snapshot_id: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{snapshot_id}:{offset}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """(snapshot_id, offset) from a cursor returned by a previous page."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        snapshot_id, offset = raw.rsplit(":", 1)
+        offset = int(offset)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise InvalidQuery("malformed cursor")
+    if offset < 0:
+        raise InvalidQuery("malformed cursor")
+    return snapshot_id, offset
+
+
+class SnapshotIndex:
+    """
+    Lookup structures over one snapshot's rows, built once when the snapshot
+    is first queried:
+
+    - row positions per status and per risk label
+    - lower-cased names for `q` substring search
+    - row order for each sort field (and the inventory order when unsorted)
+
+    Each filter/sort combination is materialized once per snapshot and
+    cached, so paging through it is a list slice.
+    """
+
+    def __init__(self, rows: list):
+        self.rows = rows
+        self.names = [row["name"].lower() for row in rows]
+        self.by_status, self.by_risk = {}, {}
+        for i, row in enumerate(rows):
+            self.by_status.setdefault(label_key(row["status"]), set()).add(i)
+            self.by_risk.setdefault(label_key(row["risk"]), set()).add(i)
+
+        everything = range(len(rows))
+        by_name = sorted(everything, key=lambda i: (self.names[i], i))
+        name_pos = {i: pos for pos, i in enumerate(by_name)}
+        self.orders = {
+            None: everything,
+            "name": by_name,
+            "status": sorted(everything, key=lambda i: (
+                STATUS_RANK.get(label_key(rows[i]["status"]), len(STATUS_RANK)), name_pos[i])),
+            "risk": sorted(everything, key=lambda i: (
+                RISK_RANK.get(label_key(rows[i]["risk"]), len(RISK_RANK)), name_pos[i])),
+        }
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def select(self, status: str = None, risk: str = None, q: str = None, sort: str = None) -> list:
+        """Row positions matching the filters, in `sort` order ("-field" for descending; None keeps inventory order)."""
+        field = sort.lstrip("-") if sort else None
+        if field is not None and field not in SORT_FIELDS:
+            raise InvalidQuery(f"unknown sort field: {field}")
+        descending = (sort or "").startswith("-")
+        key = (status or "", risk or "", (q or "").lower(), field, descending)
+
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                return cached
+
+        matches = None
+        if status:
+            wanted = _split_values(status, STATUS_RANK, "status")
+            matches = set().union(*(self.by_status.get(s, ()) for s in wanted))
+        if risk:
+            wanted = _split_values(risk, RISK_RANK, "risk")
+            risky = set().union(*(self.by_risk.get(r, ()) for r in wanted))
+            matches = risky if matches is None else matches & risky
+
+        order = self.orders[field]
+        if descending:
+            order = order[::-1]
+        needle = key[2]
+        selected = [
+            i for i in order
+            if (matches is None or i in matches) and (not needle or needle in self.names[i])
+        ]
+
+        with self._lock:
+            self._results[key] = selected
+            while len(self._results) > RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+        return selected
+
+    def page(self, selected: list, offset: int, limit: int) -> list:
+        return [self.rows[i] for i in selected[offset:offset + limit]]
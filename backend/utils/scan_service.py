@@ -0,0 +1,149 @@
+import asyncio
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.metrics import StageTimer
+from utils.scanner import get_installed_apps
+from utils.snapshots import SNAPSHOTS, Snapshot, scan_incremental
+
+# --- Scan execution settings (overridable via environment) ---
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "2"))
+SCAN_REFRESH_INTERVAL = float(os.getenv("SCAN_REFRESH_INTERVAL", "300"))  # seconds; 0 disables the scheduler
+SCAN_REFRESH_JITTER = float(os.getenv("SCAN_REFRESH_JITTER", "0.1"))  # +/- fraction of the interval
+SCAN_RETRY_AFTER = int(os.getenv("SCAN_RETRY_AFTER", "2"))  # seconds suggested to callers turned away by ScanPending
+
+
+class ScanPending(Exception):
+    """A caller's deadline ran out while the first scan was still running."""
+
+    def __init__(self, retry_after: int = SCAN_RETRY_AFTER):
+        super().__init__("the first scan is still running")
+        self.retry_after = retry_after
+
+
+def run_scan(deadline_ms: int = None) -> Snapshot:
+    """The blocking scan pipeline: enumerate installed apps, then resolve them."""
+    timer = StageTimer()
+    with timer.stage("inventory"):
+        installed_apps = get_installed_apps()
+    installed_apps_dict = {app["name"]: app["version"] for app in installed_apps}
+    snapshot = scan_incremental(installed_apps_dict, deadline_ms=deadline_ms, timer=timer)
+    snapshot.timings = timer.stages
+    return snapshot
+
+
+class ScanService:
+    """
+    Runs scans on a small dedicated thread pool so they never block the
+    event loop. At most one scan is in flight: scheduled runs, manual
+    refreshes and /scan requests arriving while it runs all share it.
+
+    `deadline_ms` shapes the scan it starts (apps still resolving when it
+    runs out come back "Pending"). A caller that joins a running scan waits
+    for it; with a deadline it gets the latest completed snapshot once the
+    deadline passes, or ScanPending when no scan has completed yet.
+    """
+
+    def __init__(self, workers: int = SCAN_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan")
+        self._inflight = None
+
+    def is_running(self) -> bool:
+        return self._inflight is not None
+
+    async def scan(self, deadline_ms: int = None) -> Snapshot:
+        future = self._inflight
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._inflight = loop.run_in_executor(self._executor, run_scan, deadline_ms)
+            future.add_done_callback(self._finished)
+        elif deadline_ms is not None:
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), deadline_ms / 1000)
+            except asyncio.TimeoutError:
+                if SNAPSHOTS.latest is None:
+                    raise ScanPending()
+                return SNAPSHOTS.latest
+
+        # shield: one caller disconnecting must not cancel the scan for the others
+        return await asyncio.shield(future)
+
+    def _finished(self, future):
+        if self._inflight is future:
+            self._inflight = None
+
+
+SCAN_SERVICE = ScanService()
+
+
+class ScanScheduler:
+    """
+    Re-scans in the background every `interval` seconds (with jitter) so
+    /scan can answer instantly from the latest completed snapshot.
+
+    Runs go through ScanService, so a scheduled run, a manual refresh and a
+    /scan request never overlap: they all share the same in-flight scan.
+    """
+
+    def __init__(self, service: ScanService = SCAN_SERVICE, interval: float = SCAN_REFRESH_INTERVAL,
+                 jitter: float = SCAN_REFRESH_JITTER):
+        self.service = service
+        self.interval = interval
+        self.jitter = jitter
+        self.last_completed_at = None
+        self.last_error = None
+        self._task = None
+        self._manual = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    @property
+    def refreshing(self) -> bool:
+        manual_pending = self._manual is not None and not self._manual.done()
+        return manual_pending or self.service.is_running()
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def refresh(self) -> Snapshot:
+        try:
+            snapshot = await self.service.scan()
+        except Exception as e:
+            self.last_error = str(e)
+            raise
+        self.last_completed_at = time.time()
+        self.last_error = None
+        return snapshot
+
+    def trigger(self) -> bool:
+        """Start a refresh now unless one is already running. Returns True if started."""
+        if self.refreshing:
+            return False
+        self._manual = asyncio.create_task(self.refresh())
+        self._manual.add_done_callback(lambda t: t.cancelled() or t.exception())  # errors land in last_error
+        return True
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"[scheduler] Background scan failed: {e}")
+            delay = self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+            await asyncio.sleep(max(1.0, delay))
+
+
+SCHEDULER = ScanScheduler()
@@ -1,6 +1,8 @@
 import platform
 import subprocess
 import json
+from utils.package_db import scan_linux_packages
+from utils.metrics import SCAN_STAGE_SECONDS, count_spawn
 
 def scan_installed_apps():
     os_type = platform.system()
@@ -9,6 +11,7 @@ def scan_installed_apps():
     if os_type == "Windows":
         try:
             # Use WMIC to list installed apps
+            count_spawn("wmic")
             result = subprocess.check_output(
                 ['wmic', 'product', 'get', 'name,version'],
                 shell=True
@@ -27,12 +30,18 @@ def scan_installed_apps():
             print(f"Windows scan error: {e}")
 
     elif os_type == "Linux":
+        # Read dpkg / apk / rpm databases directly (cached on mtime + size)
+        with SCAN_STAGE_SECONDS.time(stage="package_db"):
+            packages = scan_linux_packages()
+        if packages is not None:
+            return [{"name": name, "version": version} for name, version in packages]
+
         try:
-            # Debian-based: dpkg-query
+            # No readable database: ask dpkg-query
+            count_spawn("dpkg-query")
             result = subprocess.check_output(
-                ['dpkg-query', '-W', '-f=${Package} ${Version}\n'],
-                shell=True
-            ).decode().split("\n")
+                ['dpkg-query', '-W', '-f=${Package} ${Version}\n']
+            ).decode(errors="ignore").split("\n")
 
             for line in result:
                 if line.strip():
@@ -47,6 +56,7 @@ def scan_installed_apps():
     elif os_type == "Darwin":  # macOS
         try:
             # Use system_profiler to get applications info
+            count_spawn("system_profiler")
             result = subprocess.check_output(
                 ['system_profiler', 'SPApplicationsDataType', '-json']
             )
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import cached_property
+from utils.version_checker import NEGATIVE_CACHE_TTL, check_latest_versions, iter_latest_versions
+from utils.unknown_apps import UNKNOWN_APPS
+from utils.scan_query import SnapshotIndex
+
+# --- Snapshot settings (overridable via environment) ---
+SNAPSHOT_HISTORY = int(os.getenv("SNAPSHOT_HISTORY", "16"))  # snapshots kept for ?since= deltas
+ROW_TTL = int(os.getenv("SCAN_ROW_TTL", "900"))  # re-resolve a row after this many seconds
+
+
+class Snapshot:
+    """One resolved inventory: the installed apps plus their result rows."""
+
+    def __init__(self, inventory: dict, rows: list, resolved_at: dict):
+        self.inventory = inventory
+        self.rows = rows
+        self.rows_by_name = {row["name"]: row for row in rows}
+        self.resolved_at = resolved_at
+        self.created_at = time.time()
+        self.timings = {}  # scan stage -> seconds, for Server-Timing
+        digest = hashlib.sha1(json.dumps(rows, sort_keys=True).encode("utf-8"))
+        self.id = digest.hexdigest()[:16]
+
+    @cached_property
+    def index(self) -> SnapshotIndex:
+        """Filter/sort indexes for /scan queries, built on first use."""
+        return SnapshotIndex(self.rows)
+
+    def is_expired(self, name: str, now: float) -> bool:
+        row = self.rows_by_name[name]
+        if row["latest"] == "Pending":
+            return True
+        ttl = NEGATIVE_CACHE_TTL if row["latest"] == "Unknown" else ROW_TTL
+        return now - self.resolved_at[name] >= ttl
+
+
+class SnapshotStore:
+    def __init__(self, history: int = SNAPSHOT_HISTORY):
+        self.history = history
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def latest(self):
+        with self._lock:
+            return next(reversed(self._snapshots.values()), None)
+
+    def get(self, snapshot_id: str):
+        with self._lock:
+            return self._snapshots.get(snapshot_id)
+
+    def add(self, snapshot: Snapshot) -> Snapshot:
+        with self._lock:
+            # Identical results keep their id; just mark them most recent
+            self._snapshots[snapshot.id] = snapshot
+            self._snapshots.move_to_end(snapshot.id)
+            while len(self._snapshots) > self.history:
+                self._snapshots.popitem(last=False)
+        return snapshot
+
+
+SNAPSHOTS = SnapshotStore()
+
+
+def _stale_apps(installed_apps: dict, prev, now: float) -> dict:
+    """Apps that are new, changed version, or whose previous row expired."""
+    if prev is None:
+        return dict(installed_apps)
+    return {
+        name: current
+        for name, current in installed_apps.items()
+        if prev.inventory.get(name) != current or prev.is_expired(name, now)
+    }
+
+
+def _assemble(installed_apps: dict, prev, fresh: dict, now: float) -> Snapshot:
+    rows, resolved_at = [], {}
+    for name in installed_apps:
+        if name in fresh:
+            rows.append(fresh[name])
+            resolved_at[name] = now
+        else:
+            rows.append(prev.rows_by_name[name])
+            resolved_at[name] = prev.resolved_at[name]
+    return Snapshot(dict(installed_apps), rows, resolved_at)
+
+
+def scan_incremental(installed_apps: dict, deadline_ms: int = None, store: SnapshotStore = SNAPSHOTS,
+                     timer=None) -> Snapshot:
+    """
+    Resolve only apps that are new, changed version, or whose row expired
+    since the previous snapshot; everything else is carried over as-is.
+    """
+    prev = store.latest
+    now = time.time()
+    stale = _stale_apps(installed_apps, prev, now)
+    fresh = {row["name"]: row for row in check_latest_versions(stale, deadline_ms=deadline_ms, timer=timer)}
+    snapshot = _assemble(installed_apps, prev, fresh, now)
+    UNKNOWN_APPS.record(snapshot.rows)
+    return store.add(snapshot)
+
+
+def stream_incremental(installed_apps: dict, store: SnapshotStore = SNAPSHOTS, timer=None):
+    """
+    Streaming form of `scan_incremental`: yields carried-over rows first, then
+    each re-resolved row as it completes, and finally the stored Snapshot
+    (with `timer`'s stages as its timings).
+    """
+    prev = store.latest
+    now = time.time()
+    stale = _stale_apps(installed_apps, prev, now)
+
+    for name in installed_apps:
+        if name not in stale:
+            yield prev.rows_by_name[name]
+
+    fresh = {}
+    for row in iter_latest_versions(stale, timer=timer):
+        fresh[row["name"]] = row
+        yield row
+
+    snapshot = _assemble(installed_apps, prev, fresh, now)
+    if timer is not None:
+        snapshot.timings = timer.stages
+    UNKNOWN_APPS.record(snapshot.rows)
+    yield store.add(snapshot)
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> dict:
+    """Rows added, removed and changed between two snapshots."""
+    added, changed = [], []
+    for row in new.rows:
+        before = old.rows_by_name.get(row["name"])
+        if before is None:
+            added.append(row)
+        elif before != row:
+            changed.append(row)
+    removed = [row for row in old.rows if row["name"] not in new.rows_by_name]
+    return {"added": added, "removed": removed, "changed": changed}
@@ -0,0 +1,187 @@
+import json
+import os
+import threading
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, single worker only
+    fcntl = None
+
+# --- Unknown-apps log settings (overridable via environment) ---
+UNKNOWN_APPS_LOG = os.getenv(
+    "UNKNOWN_APPS_LOG",
+    str(Path(__file__).resolve().parent.parent / ".cache" / "unknown_apps.log"),
+)
+FLUSH_INTERVAL = float(os.getenv("UNKNOWN_APPS_FLUSH_INTERVAL", "10"))  # seconds
+COMPACT_MIN_BYTES = 256 * 1024  # don't bother compacting logs smaller than this
+
+
+def _generation(first_line: bytes):
+    if first_line.startswith(b'{"generation"'):
+        try:
+            return json.loads(first_line)["generation"]
+        except (ValueError, KeyError):
+            pass
+    return None
+
+
+def unknown_key(row: dict) -> str:
+    return f"{row['name']} | Current: {row['current']}"
+
+
+class UnknownAppsLog:
+    """
+    Frequency of apps whose latest version could not be resolved.
+
+    - record() only bumps an in-process Counter
+    - flush() (every FLUSH_INTERVAL seconds) appends the pending deltas as
+      JSON lines in a single O_APPEND write, so several uvicorn workers can
+      share one log without losing increments
+    - totals are kept in memory by reading only what was appended since the
+      last read; /unknown never touches the file
+    - once the log has grown well past its last compacted size it is
+      rewritten as one line per key, under an exclusive lock that appenders
+      respect with a shared one
+    """
+
+    def __init__(self, path: str = UNKNOWN_APPS_LOG, interval: float = FLUSH_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._pending = Counter()
+        self._totals = Counter()
+        self._generation = None  # generation header of the log read so far
+        self._offset = 0
+        self._compacted_size = 0
+        self._lock = threading.Lock()  # guards _pending
+        self._io_lock = threading.Lock()  # guards the log and _totals within this process
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record(self, rows: list):
+        unknown = [unknown_key(row) for row in rows if row.get("latest") == "Unknown"]
+        if unknown:
+            with self._lock:
+                self._pending.update(unknown)
+
+    def snapshot(self) -> dict:
+        """Totals across all workers (as of their last flush) plus this worker's unflushed counts."""
+        with self._io_lock:
+            if not self._offset:
+                self._read_new()
+            totals = Counter(self._totals)
+        with self._lock:
+            totals.update(self._pending)
+        return dict(totals.most_common())
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+        finally:
+            os.close(fd)  # releases the lock
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+
+        with self._io_lock:
+            if pending:
+                data = "".join(
+                    json.dumps({"key": key, "count": count}, ensure_ascii=False) + "\n"
+                    for key, count in pending.items()
+                ).encode("utf-8")
+                try:
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    with self._file_lock(exclusive=False):
+                        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                        try:
+                            os.write(fd, data)
+                        finally:
+                            os.close(fd)
+                except OSError as e:
+                    print(f"Unknown-apps log write failed: {e}")
+                    with self._lock:
+                        self._pending.update(pending)  # retry on the next flush
+                    return
+
+            self._read_new()
+            if self._offset > max(COMPACT_MIN_BYTES, 2 * self._compacted_size):
+                self._compact()
+
+    def _read_new(self):
+        """Fold lines appended since the last read into the totals."""
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+
+        with f:
+            # Compaction starts the file with a fresh generation header; inode
+            # numbers can be reused, so they can't tell us the file was replaced
+            generation = _generation(f.readline())
+            size = f.seek(0, os.SEEK_END)
+            if generation != self._generation or size < self._offset:
+                self._totals = Counter()
+                self._offset = 0
+                self._compacted_size = size
+                self._generation = generation
+            if size <= self._offset:
+                return
+            f.seek(self._offset)
+            chunk = f.read(size - self._offset)
+
+        end = chunk.rfind(b"\n") + 1  # leave a partially written line for next time
+        for line in chunk[:end].splitlines():
+            try:
+                entry = json.loads(line)
+                self._totals[entry["key"]] += int(entry["count"])
+            except (ValueError, KeyError, TypeError):
+                continue  # generation header or damaged line
+        self._offset += end
+
+    def _compact(self):
+        with self._file_lock(exclusive=True):
+            self._read_new()  # anything appended before we got the lock
+            generation = uuid.uuid4().hex
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"generation": generation}) + "\n")
+                for key, count in self._totals.items():
+                    f.write(json.dumps({"key": key, "count": count}, ensure_ascii=False) + "\n")
+            os.replace(tmp, self.path)
+            self._generation = generation
+            self._offset = self._compacted_size = os.path.getsize(self.path)
+
+    # --- Background flushing ---
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="unknown-apps-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Unknown-apps flush failed: {e}")
+
+
+UNKNOWN_APPS = UnknownAppsLog()
@@ -0,0 +1,180 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+# --- Cache settings (overridable via environment) ---
+CACHE_BACKEND = os.getenv("VERSION_CACHE_BACKEND", "sqlite")  # "sqlite" or "memory"
+CACHE_PATH = os.getenv(
+    "VERSION_CACHE_PATH",
+    str(Path(__file__).resolve().parent.parent / ".cache" / "versions.db"),
+)
+CACHE_MAX_ENTRIES = int(os.getenv("VERSION_CACHE_MAX_ENTRIES", "5000"))  # floor; reservations can raise it
+# Hard ceiling for inventory-based sizing; set it to VERSION_CACHE_MAX_ENTRIES to turn growth off
+CACHE_MAX_ENTRIES_LIMIT = int(os.getenv("VERSION_CACHE_MAX_ENTRIES_LIMIT", "50000"))
+
+
+class CacheBackend:
+    """
+    Stores latest-version lookups keyed by (backend, query).
+    `get` returns (value, fetched_at) or None; TTL policy lives with the caller.
+
+    The size cap starts at `max_entries`. Callers that know how many lookups
+    they are about to make `reserve` room for them, so one scan never evicts
+    its own results; the cap never exceeds `limit`.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, limit: int = CACHE_MAX_ENTRIES_LIMIT):
+        self.min_entries = max_entries
+        self.limit = max(limit, max_entries)
+        self.max_entries = max_entries
+        self._reservations = {}
+
+    def reserve(self, owner: str, entries: int):
+        """
+        Hold room for `entries` lookups on behalf of `owner` ("scan", "fleet").
+        Replaces that owner's previous reservation, so the cap follows the
+        inventory down as well as up.
+        """
+        self._reservations[owner] = entries
+        self.max_entries = min(self.limit, max(self.min_entries, sum(self._reservations.values())))
+
+    def get(self, backend: str, query: str):
+        raise NotImplementedError
+
+    def set(self, backend: str, query: str, value: str, fetched_at: float = None):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """Process-local LRU cache."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, limit: int = CACHE_MAX_ENTRIES_LIMIT):
+        super().__init__(max_entries, limit)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, backend: str, query: str):
+        with self._lock:
+            entry = self._data.get((backend, query))
+            if entry is not None:
+                self._data.move_to_end((backend, query))
+            return entry
+
+    def set(self, backend: str, query: str, value: str, fetched_at: float = None):
+        with self._lock:
+            self._data[(backend, query)] = (value, fetched_at or time.time())
+            self._data.move_to_end((backend, query))
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCache(CacheBackend):
+    """
+    On-disk LRU cache shared by every process that points at the same file.
+    WAL mode lets several uvicorn workers read while one writes.
+    """
+
+    EVICT_EVERY = 50  # check the size cap every N writes
+
+    def __init__(self, path: str = CACHE_PATH, max_entries: int = CACHE_MAX_ENTRIES,
+                 limit: int = CACHE_MAX_ENTRIES_LIMIT):
+        super().__init__(max_entries, limit)
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS versions (
+                backend TEXT NOT NULL,
+                query TEXT NOT NULL,
+                value TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (backend, query)
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS versions_accessed ON versions (accessed_at)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, backend: str, query: str):
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, fetched_at FROM versions WHERE backend = ? AND query = ?",
+            (backend, query),
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            conn.execute(
+                "UPDATE versions SET accessed_at = ? WHERE backend = ? AND query = ?",
+                (time.time(), backend, query),
+            )
+            conn.commit()
+        except sqlite3.OperationalError:
+            pass  # another worker holds the write lock; recency is best-effort
+        return row[0], row[1]
+
+    def set(self, backend: str, query: str, value: str, fetched_at: float = None):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO versions (backend, query, value, fetched_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (backend, query, value, fetched_at or now, now),
+        )
+        conn.commit()
+
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % self.EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        conn = self._conn()
+        conn.execute(
+            "DELETE FROM versions WHERE rowid IN ("
+            "  SELECT rowid FROM versions ORDER BY accessed_at DESC LIMIT -1 OFFSET ?"
+            ")",
+            (self.max_entries,),
+        )
+        conn.commit()
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM versions")
+        conn.commit()
+
+
+def create_cache(kind: str = CACHE_BACKEND) -> CacheBackend:
+    if kind == "sqlite":
+        try:
+            return SQLiteCache()
+        except (sqlite3.Error, OSError) as e:
+            print(f"[version cache] SQLite unavailable at {CACHE_PATH}, using memory: {e}")
+    return MemoryCache()
@@ -1,15 +1,17 @@
-import requests
 import subprocess
+import shutil
 import re
 import time
-import json
-from fastapi import FastAPI
-from utils.scanner import get_installed_apps
-from packaging import version
-from pathlib import Path
-from collections import defaultdict
-
-app = FastAPI()
+from utils.resolver import RESOLVER
+from utils.http_client import HTTP, NPM_REGISTRY_URL, PYPI_URL, pypi_info_version
+from utils.circuit_breaker import BackendUnavailable, get_breaker
+from utils.version_cache import create_cache
+from utils.winget_index import WINGET_INDEX
+from utils.dotnet_catalog import DOTNET_CATALOG
+from utils.app_matcher import compile_rules
+from utils.versioning import classify, classify_many
+from utils.offline_catalog import OFFLINE_CATALOG, OFFLINE_MODE
+from utils.metrics import BACKEND_REQUEST_SECONDS, VERSION_CACHE_TOTAL, StageTimer, count_spawn
 
 # --- Known app mapping ---
 APP_NAME_MAPPING = {
@@ -35,10 +37,12 @@ APP_NAME_MAPPING = {
     "Google Chrome": {"type": "winget", "query": "Google.Chrome"},
 
     # --- NEW: .NET families ---
-    "Microsoft .NET Host - 6.0": {"type": "dotnet", "version_family": "6.0"},
-    "Microsoft .NET Host - 8.0": {"type": "dotnet", "version_family": "8.0"},
-    "Microsoft ASP.NET Core 6.0": {"type": "dotnet", "version_family": "6.0"},
-    "Microsoft ASP.NET Core 8.0": {"type": "dotnet", "version_family": "8.0"},
+    "Microsoft .NET Host - 6.0": {"type": "dotnet", "version_family": "6.0", "component": "runtime"},
+    "Microsoft .NET Host - 8.0": {"type": "dotnet", "version_family": "8.0", "component": "runtime"},
+    "Microsoft .NET Runtime - 6.0": {"type": "dotnet", "version_family": "6.0", "component": "runtime"},
+    "Microsoft .NET Runtime - 8.0": {"type": "dotnet", "version_family": "8.0", "component": "runtime"},
+    "Microsoft ASP.NET Core 6.0": {"type": "dotnet", "version_family": "6.0", "component": "aspnetcore"},
+    "Microsoft ASP.NET Core 8.0": {"type": "dotnet", "version_family": "8.0", "component": "aspnetcore"},
 
     # --- NEW: Epic Games ---
     "Epic Games Launcher": {"type": "winget", "query": "EpicGames.EpicGamesLauncher"},
@@ -50,237 +54,361 @@ APP_NAME_MAPPING = {
 }
 
 # --- Cache ---
-CACHE = {}
-CACHE_TTL = 3600  # 1 hour
+CACHE = create_cache()
+CACHE_TTL = 3600  # 1 hour (default for backends without their own TTL)
+CACHE_TTLS = {
+    "pypi": 3600,
+    "npm": 3600,
+    "winget": 6 * 3600,
+    "dotnet": 6 * 3600,
+}
+CACHE_STALE_TTL = 24 * 3600  # serve stale values this long past their TTL while refreshing
+NEGATIVE_CACHE_TTL = 300  # "Unknown" answers are retried much sooner than real ones
+CACHE_ENTRIES_PER_APP = 2  # room for apps whose first candidate misses (see CacheBackend.reserve)
 
 
-def get_cached_version(key: str, fetch_func) -> str:
-    current_time = time.time()
-    if key in CACHE:
-        val, ts = CACHE[key]
-        if current_time - ts < CACHE_TTL:
-            return val
-    val = fetch_func(key)
-    CACHE[key] = (val, current_time)
+def fetch_guarded(backend: str, fetch_func, query: str):
+    """
+    Run a backend fetch behind its circuit breaker.
+    Returns None when the breaker is open or the backend failed.
+    """
+    breaker = get_breaker(backend)
+    if not breaker.allow():
+        BACKEND_REQUEST_SECONDS.observe(0, backend=backend, outcome="breaker_open")
+        return None
+    start = time.perf_counter()
+    try:
+        val = fetch_func(query)
+    except Exception as e:
+        BACKEND_REQUEST_SECONDS.observe(time.perf_counter() - start, backend=backend, outcome="error")
+        breaker.record_failure(e)
+        return None
+    BACKEND_REQUEST_SECONDS.observe(time.perf_counter() - start, backend=backend, outcome="ok")
+    breaker.record_success()
     return val
 
 
+def get_cached_version(key: str, fetch_func, backend: str) -> str:
+    entry = CACHE.get(backend, key)
+
+    def fetch_and_store(query: str) -> str:
+        val = fetch_guarded(backend, fetch_func, query)
+        if val is None:
+            # Backend failed: keep whatever we had rather than caching the failure
+            return entry[0] if entry is not None else "Unknown"
+        CACHE.set(backend, query, val)
+        return val
+
+    if entry is not None:
+        val, ts = entry
+        age = time.time() - ts
+        ttl = NEGATIVE_CACHE_TTL if val == "Unknown" else CACHE_TTLS.get(backend, CACHE_TTL)
+        if age < ttl:
+            VERSION_CACHE_TOTAL.inc(backend=backend, result="hit")
+            return val
+        if age < ttl + CACHE_STALE_TTL:
+            # Stale-while-revalidate: answer now, refresh for the next caller
+            VERSION_CACHE_TOTAL.inc(backend=backend, result="stale")
+            RESOLVER.refresh(backend, key, fetch_and_store)
+            return val
+
+    VERSION_CACHE_TOTAL.inc(backend=backend, result="miss")
+    # Concurrent misses for the same query share a single fetch
+    return RESOLVER.lookup(backend, key, fetch_and_store)
+
+
 # --- PyPI ---
 def check_pypi(package_name: str) -> str:
-    return get_cached_version(package_name, _check_pypi)
+    return get_cached_version(package_name, _check_pypi, "pypi")
 
 
 def _check_pypi(package_name: str) -> str:
-    try:
-        resp = requests.get(f"https://pypi.org/pypi/{package_name}/json", timeout=5)
-        if resp.status_code == 200:
-            return resp.json()["info"]["version"]
-    except:
-        pass
-    return "Unknown"
+    # Parsed incrementally: only the leading "info" object is read
+    latest = HTTP.get_json(f"{PYPI_URL}/{package_name}/json", extract=pypi_info_version)
+    return latest or "Unknown"
 
 
 # --- NPM ---
 def check_npm(package_name: str) -> str:
-    return get_cached_version(package_name, _check_npm)
+    return get_cached_version(package_name, _check_npm, "npm")
 
 
 def _check_npm(package_name: str) -> str:
-    try:
-        resp = requests.get(f"https://registry.npmjs.org/{package_name}/latest", timeout=5)
-        if resp.status_code == 200:
-            return resp.json()["version"]
-    except:
-        pass
-    return "Unknown"
+    manifest = HTTP.get_json(f"{NPM_REGISTRY_URL}/{package_name}/latest")
+    return manifest["version"] if manifest else "Unknown"
 
 
 # --- Winget ---
+WINGET_TIMEOUT = 30
+
+
+def refresh_winget_index():
+    """One bulk `winget list` per scan instead of a `winget show` per app."""
+    fetch_guarded("winget", lambda _: WINGET_INDEX.refresh(), "list")
+
+
 def check_winget(app_id: str) -> str:
-    return get_cached_version(app_id, _check_winget)
+    indexed = WINGET_INDEX.get(app_id)
+    if indexed:
+        return indexed
+    # Not in the bulk listing (e.g. not installed locally): per-app lookup
+    return get_cached_version(app_id, _check_winget, "winget")
 
 
 def _check_winget(app_id: str) -> str:
-    # Try precise `winget show`
+    if shutil.which("winget") is None:
+        raise BackendUnavailable("winget is not installed")
+
+    # Try precise `winget show` (non-zero exit just means "no such id")
     try:
+        count_spawn("winget")
         result = subprocess.check_output(
             ["winget", "show", app_id],
             text=True,
-            stderr=subprocess.DEVNULL
+            stderr=subprocess.DEVNULL,
+            timeout=WINGET_TIMEOUT
         )
         match = re.search(r"Version:\s*([\d\.]+)", result)
         if match:
             return match.group(1).strip()
-    except Exception:
+    except subprocess.CalledProcessError:
         pass
 
     # Fallback to `winget search`
     try:
+        count_spawn("winget")
         result = subprocess.check_output(
             ["winget", "search", "--name", app_id],
             text=True,
-            stderr=subprocess.DEVNULL
+            stderr=subprocess.DEVNULL,
+            timeout=WINGET_TIMEOUT
         )
         matches = re.findall(r"\d+(?:\.\d+)+", result)
         if matches:
             return matches[-1]
-    except Exception:
+    except subprocess.CalledProcessError:
         pass
 
     return "Unknown"
 
 
 # --- .NET checker ---
-DOTNET_INDEX_URL = "https://dotnetcli.blob.core.windows.net/dotnet/release-metadata/releases-index.json"
-
-
-def check_dotnet(version_family: str) -> str:
+def check_dotnet(version_family: str, component: str = "runtime") -> str:
     """
     version_family: e.g. "6.0", "8.0"
-    Returns latest runtime version from official Microsoft feeds
+    component: "runtime" (also the .NET Host version), "aspnetcore", "windowsdesktop" or "sdk"
+    Returns the latest version from the cached Microsoft release catalog
     """
-    try:
-        index = requests.get(DOTNET_INDEX_URL, timeout=5).json()
-        for release in index["releases-index"]:
-            if release["channel-version"].startswith(version_family):
-                family_url = release["releases.json"]
-                family_data = requests.get(family_url, timeout=5).json()
-                # Pick highest runtime version that is not preview
-                versions = [
-                    rel["runtime"]["version"]
-                    for rel in family_data.get("releases", [])
-                    if "runtime" in rel and "version" in rel["runtime"]
-                ]
-                if versions:
-                    return max(versions, key=version.parse)
-    except Exception as e:
-        print(f"[.NET checker] Failed for {version_family}: {e}")
-    return "Unknown"
+    latest = fetch_guarded("dotnet", lambda family: DOTNET_CATALOG.latest(family, component), version_family)
+    return latest or "Unknown"
 
 
 # --- Risk assessment with normalized versions ---
+# Versions are parsed once per scheme (PEP 440, Debian, dotted Windows) and
+# memoized; see utils/versioning.py
 def assess_risk(current: str, latest: str) -> str:
-    if latest == "Unknown" or current == "Unknown":
-        return "Unknown ❓"
+    return classify(current, latest)[1]
 
-    try:
-        cur_v = version.parse(current)
-        lat_v = version.parse(latest)
 
-        if cur_v >= lat_v:
-            return "Low ✅"   # up-to-date or ahead
-        elif cur_v.major < lat_v.major:
-            return "High 🔴"  # major version gap
-        elif cur_v.minor < lat_v.minor:
-            return "Medium 🟠"  # minor version gap
-        else:
-            return "Low ⚠️"   # just patch behind
-    except Exception:
-        return "High ⚠️" if current != latest else "Low ✅"
+# --- Name matching ---
+# Regex fallbacks for names that no mapping rule covers:
+# (rule id, pattern on the raw name, anchor token, target, confidence)
+FALLBACK_RULES = [
+    ("fallback:python-pip", r"Python.*(?i:pip|bootstrap)|(?i:pip|bootstrap).*Python", "python",
+     {"type": "pypi", "query": "pip"}, 0.6),
+    ("fallback:python", r"Python", "python", {"type": "winget", "query": "Python.Python.3"}, 0.5),
+    ("fallback:node.js", r"Node\.js", "node.js", {"type": "npm", "query": "npm"}, 0.5),
+    ("fallback:npm", r"npm", "npm", {"type": "npm", "query": "npm"}, 0.5),
+    ("fallback:java", r"Java", "java", {"type": "hardcoded", "version": "22.0.0"}, 0.4),
+]
+
+# Compiled once at import; see utils/app_matcher.py
+MATCHER = compile_rules(APP_NAME_MAPPING, FALLBACK_RULES)
 
 
 # --- Main checker ---
-def check_latest_versions(installed_apps: dict) -> list:
-    results = []
-
-    for app, current_version in installed_apps.items():
-        latest = "Unknown"
-
-        # --- Check mapping first ---
-        if app in APP_NAME_MAPPING:
-            mapping = APP_NAME_MAPPING[app]
-            if mapping["type"] == "winget":
-                latest = check_winget(mapping["query"])
-            elif mapping["type"] == "pypi":
-                latest = check_pypi(mapping["query"])
-            elif mapping["type"] == "npm":
-                latest = check_npm(mapping["query"])
-            elif mapping["type"] == "hardcoded":
-                latest = mapping["version"]
-            elif mapping["type"] == "dotnet":
-                latest = check_dotnet(mapping["version_family"])
-
-        # --- Fallback rules ---
-        if latest == "Unknown":
-            if "Python" in app:
-                if "pip" in app.lower() or "bootstrap" in app.lower():
-                    latest = check_pypi("pip")
-                else:
-                    latest = check_winget("Python.Python.3")
-            elif "Node.js" in app or "npm" in app:
-                latest = check_npm("npm")
-            elif "Java" in app:
-                latest = "22.0.0"  # fallback
-            else:
-                latest = check_winget(app)
-
-        # --- Status with version parsing ---
-        try:
-            if latest != "Unknown" and version.parse(current_version) >= version.parse(latest):
-                status = "Up-to-date ✅"
-            elif latest != "Unknown":
-                status = "Update Available ⚠️"
-            else:
-                status = "Unknown ❓"
-        except Exception:
-            status = "Update Available ⚠️" if latest != "Unknown" else "Unknown ❓"
-
-        risk = assess_risk(current_version, latest)
-
-        results.append({
-            "name": app,
-            "current": current_version,
-            "latest": latest,
-            "status": status,
-            "risk": risk
-        })
+def catalog_query(target: dict) -> str:
+    """Offline catalog name for a mapping target (see utils/offline_catalog.py)."""
+    if target["type"] == "dotnet":
+        return f"{target['version_family']}:{target.get('component', 'runtime')}"
+    return target.get("query", "")
+
+
+def lookup_target(target: dict) -> str:
+    if target["type"] in ("winget", "pypi", "npm", "dotnet"):
+        offline = OFFLINE_CATALOG.lookup(target["type"], catalog_query(target))
+        if offline:
+            return offline
+        if OFFLINE_MODE == "strict":
+            return "Unknown"  # air-gapped: never fall through to the network
+
+    if target["type"] == "winget":
+        return check_winget(target["query"])
+    elif target["type"] == "pypi":
+        return check_pypi(target["query"])
+    elif target["type"] == "npm":
+        return check_npm(target["query"])
+    elif target["type"] == "hardcoded":
+        return target["version"]
+    elif target["type"] == "dotnet":
+        return check_dotnet(target["version_family"], target.get("component", "runtime"))
+    return "Unknown"
 
-    return results
 
+def resolve_by_rules(app: str) -> tuple:
+    """
+    For apps the catalog has no display-name entry for: try matching rules
+    best-first until one yields a version, then fall back to a winget lookup
+    by name, then to the latest_versions.json sample data.
+    """
+    for match in MATCHER.candidates(app):
+        latest = lookup_target(match.target)
+        if latest != "Unknown":
+            return latest, match.rule.id
 
-# --- Logging for unknown apps (with frequency) ---
-def log_unknown_apps(results: list):
-    log_file = Path("unknown_apps.json")
-    data = defaultdict(int)
+    if OFFLINE_MODE == "strict":
+        return "Unknown", None
+    return seed_fallback(app, check_winget(app))
 
-    # Load existing
-    if log_file.exists():
-        try:
-            data.update(json.loads(log_file.read_text(encoding="utf-8")))
-        except:
-            pass
 
-    # Count unknowns
-    for app in results:
-        if app["latest"] == "Unknown":
-            key = f"{app['name']} | Current: {app['current']}"
-            data[key] += 1
+def seed_fallback(app: str, latest: str) -> tuple:
+    """(latest, None), or the sample-data version when nothing else knew the app."""
+    if latest == "Unknown":
+        seeded = OFFLINE_CATALOG.lookup_seed(app)
+        if seeded:
+            return seeded, "catalog:seed"
+    return latest, None
 
-    log_file.write_text(json.dumps(data, indent=2), encoding="utf-8")
 
+def target_key(target: dict) -> tuple:
+    """(backend, query) a mapping target is looked up by."""
+    return target["type"], catalog_query(target) or target.get("version", "")
 
-# --- FastAPI Routes ---
-@app.get("/")
-def root():
-    return {"message": "Driver & App Version Checker API running 🚀. Use /scan to check installed apps."}
 
+def resolve_many(apps) -> dict:
+    """
+    The offline catalog by display name, then resolve_by_rules, for many
+    names at once, looking each distinct (backend, query) target up once:
+    all names try their best candidate first, then the names still
+    "Unknown" move on to their next candidate, round by round.
+    Returns {name: (latest, rule id or None)}.
+    """
+    names = list(dict.fromkeys(apps))
+    results = {name: (latest, "catalog:name") for name, latest in OFFLINE_CATALOG.lookup_many("name", names).items()}
+    pending = {name: MATCHER.candidates(name) for name in names if name not in results}
+    looked_up = {}  # (backend, query) -> latest
+    exhausted = []
+    depth = 0
+    while pending:
+        wanted = {}
+        for name, candidates in list(pending.items()):
+            if depth >= len(candidates):
+                del pending[name]
+                exhausted.append(name)
+                continue
+            target = candidates[depth].target
+            wanted.setdefault(target_key(target), target)
+        fresh = [key for key in wanted if key not in looked_up]
+        looked_up.update(zip(fresh, RESOLVER.map(lambda key: lookup_target(wanted[key]), fresh)))
+        for name, candidates in list(pending.items()):
+            latest = looked_up[target_key(candidates[depth].target)]
+            if latest != "Unknown":
+                results[name] = (latest, candidates[depth].rule.id)
+                del pending[name]
+        depth += 1
+
+    if OFFLINE_MODE == "strict":
+        results.update((name, ("Unknown", None)) for name in exhausted)
+    else:
+        results.update(
+            (name, seed_fallback(name, latest)) for name, latest in zip(exhausted, RESOLVER.map(check_winget, exhausted))
+        )
+    return results
 
-@app.get("/scan")
-def scan_and_check():
-    installed_apps = get_installed_apps()
-    installed_dict = {app["name"]: app["version"] for app in installed_apps}
-    results = check_latest_versions(installed_dict)
-    log_unknown_apps(results)  # log apps with unknown latest versions
-    return {"apps": results}
 
+def build_result(app: str, current_version: str, latest: str, rule: str = None) -> dict:
+    status, risk = classify(current_version, latest)
+    return {
+        "name": app,
+        "current": current_version,
+        "latest": latest,
+        "status": status,
+        "risk": risk,
+        "rule": rule
+    }
 
-@app.get("/unknown")
-def get_unknowns():
-    log_file = Path("unknown_apps.json")
-    if not log_file.exists():
-        return {"unknown_apps": []}
-    try:
-        data = json.loads(log_file.read_text(encoding="utf-8"))
-    except:
-        data = {}
-    return {"unknown_apps": data}
+
+def check_latest_versions(installed_apps: dict, deadline_ms: int = None, timer: StageTimer = None) -> list:
+    """
+    Resolve every app concurrently; results keep the input order.
+    With `deadline_ms`, apps still resolving when the budget runs out are
+    returned as "Pending" (their lookups keep running and warm the cache).
+    Stage durations (catalog, resolve, classify) are recorded on `timer`.
+    """
+    def resolve(item):
+        app, current_version = item
+        return (app, current_version, *resolve_by_rules(app))
+
+    def pending(item):
+        return (*item, "Pending", None)
+
+    if not installed_apps:
+        return []
+    timer = timer or StageTimer()
+
+    # Apps the offline catalog knows by name need no lookups at all
+    with timer.stage("catalog"):
+        offline = OFFLINE_CATALOG.lookup_many("name", installed_apps)
+    remaining = [(app, current) for app, current in installed_apps.items() if app not in offline]
+    CACHE.reserve("scan", len(remaining) * CACHE_ENTRIES_PER_APP)
+
+    resolved_online = {}
+    if remaining:
+        with timer.stage("resolve"):
+            if OFFLINE_MODE != "strict":
+                refresh_winget_index()
+            timeout = deadline_ms / 1000 if deadline_ms is not None else None
+            resolved_online = {
+                entry[0]: entry
+                for entry in RESOLVER.map(resolve, remaining, timeout=timeout, default=pending)
+            }
+    resolved = [
+        resolved_online[app] if app not in offline else (app, current, offline[app], "catalog:name")
+        for app, current in installed_apps.items()
+    ]
+
+    # Network work is done; status and risk for the whole inventory in one pass
+    with timer.stage("classify"):
+        verdicts = classify_many((current, latest) for _, current, latest, _ in resolved)
+        return [
+            {"name": app, "current": current, "latest": latest, "status": status, "risk": risk, "rule": rule}
+            for (app, current, latest, rule), (status, risk) in zip(resolved, verdicts)
+        ]
+
+
+def iter_latest_versions(installed_apps: dict, timer: StageTimer = None):
+    """
+    Yield result rows as each app resolves (completion order, not input order).
+    Stage durations (catalog, resolve) are recorded on `timer`.
+    """
+    if not installed_apps:
+        return
+    timer = timer or StageTimer()
+
+    def resolve(item):
+        app, current_version = item
+        return build_result(app, current_version, *resolve_by_rules(app))
+
+    with timer.stage("catalog"):
+        offline = OFFLINE_CATALOG.lookup_many("name", installed_apps)
+    for app, latest in offline.items():
+        yield build_result(app, installed_apps[app], latest, "catalog:name")
+
+    remaining = [(app, current) for app, current in installed_apps.items() if app not in offline]
+    CACHE.reserve("scan", len(remaining) * CACHE_ENTRIES_PER_APP)
+    if remaining:
+        def resolve_all():
+            if OFFLINE_MODE != "strict":
+                refresh_winget_index()
+            yield from RESOLVER.iter_completed(resolve, remaining)
+        yield from timer.iterate("resolve", resolve_all())
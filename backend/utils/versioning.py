@@ -0,0 +1,147 @@
+import re
+from functools import lru_cache
+from packaging.version import InvalidVersion, Version
+
+# --- Version schemes ---
+# pep440:  PyPI / most upstream releases        ("3.13.0rc1", "2.1.post1")
+# debian:  dpkg / apk / rpm style               ("1:2.3.4-1ubuntu2", "5.0~rc1")
+# dotted:  Windows file/product versions        ("1.4.0.0", "14.42.34438")
+SCHEME_RANK = {"dotted": 0, "pep440": 1, "debian": 2}
+
+_DOTTED = re.compile(r"^\d+(?:\.\d+)*$")
+_DIGITS = re.compile(r"\d+")
+_SEGMENTS = re.compile(r"(\D*)(\d*)")
+
+
+@lru_cache(maxsize=65536)
+def detect_scheme(v: str) -> str:
+    if _DOTTED.match(v):
+        return "dotted"
+    if ":" in v or "~" in v:
+        return "debian"
+    try:
+        # Only canonical spellings are PEP 440: "1.2-1+deb12u1" and "1.0a"
+        # parse, but they are distro versions and must sort the dpkg way
+        return "pep440" if str(Version(v)) == v else "debian"
+    except InvalidVersion:
+        return "debian"
+
+
+def common_scheme(current: str, latest: str) -> str:
+    """The most permissive scheme either side needs, so both parse the same way."""
+    return max(detect_scheme(current), detect_scheme(latest), key=SCHEME_RANK.get)
+
+
+def _dpkg_char_weight(c: str) -> int:
+    # dpkg ordering: "~" sorts before everything (even the end of the string),
+    # letters sort before non-letters
+    if c == "~":
+        return -1
+    if c.isalpha():
+        return ord(c)
+    return ord(c) + 256
+
+
+@lru_cache(maxsize=4096)
+def _dpkg_text_key(text: str) -> tuple:
+    # Non-digit runs (".", "-", "ubuntu", "+deb") repeat across a whole inventory
+    return tuple(_dpkg_char_weight(c) for c in text) + (0,)
+
+
+def _dpkg_part_key(part: str) -> tuple:
+    """
+    Sort key equivalent to dpkg's verrevcmp: alternating non-digit runs
+    (compared by weight, terminated by 0 so "end" sits between "~" and
+    everything else) and digit runs (compared numerically).
+    """
+    key = []
+    for text, digits in _SEGMENTS.findall(part):
+        if not text and not digits:
+            continue
+        key.append((_dpkg_text_key(text), int(digits) if digits else 0))
+    key.append(((0,), 0))  # what dpkg compares against once a string runs out
+    return tuple(key)
+
+
+class ParsedVersion:
+    __slots__ = ("key", "release")
+
+    def __init__(self, key, release: tuple):
+        self.key = key
+        self.release = release  # numeric components used for major/minor risk
+
+    def component(self, n: int) -> int:
+        return self.release[n] if n < len(self.release) else 0
+
+
+@lru_cache(maxsize=65536)
+def parse(v: str, scheme: str) -> ParsedVersion:
+    """Parse once per (version, scheme); results are memoized."""
+    if scheme == "dotted":
+        release = tuple(int(p) for p in _DIGITS.findall(v))
+        trimmed = release
+        while trimmed and trimmed[-1] == 0:
+            trimmed = trimmed[:-1]  # 1.4.0.0 == 1.4
+        return ParsedVersion(trimmed, release)
+
+    if scheme == "pep440":
+        parsed = Version(v)
+        return ParsedVersion(parsed, parsed.release)
+
+    epoch, _, rest = v.partition(":") if ":" in v else ("0", "", v)  # the epoch ends at the first ":"
+    upstream, _, revision = rest.rpartition("-") if "-" in rest else (rest, "", "")
+    key = (int(epoch) if epoch.isdigit() else 0, _dpkg_part_key(upstream), _dpkg_part_key(revision))
+    release = tuple(int(p) for p in _DIGITS.findall(upstream.split("~")[0].split("+")[0])[:3])
+    return ParsedVersion(key, release)
+
+
+def _strip_epoch(v: str) -> str:
+    epoch, sep, rest = v.partition(":")
+    return rest if sep and epoch.isdigit() else v
+
+
+def _without_lone_epoch(current: str, latest: str) -> tuple:
+    """
+    Epochs are local to one distro's packaging, so they only order two
+    versions that both carry one: "1:2.3.4-1ubuntu2" vs a registry's "3.0.0"
+    compares as "2.3.4-1ubuntu2" vs "3.0.0".
+    """
+    bare_current, bare_latest = _strip_epoch(current), _strip_epoch(latest)
+    if (bare_current == current) != (bare_latest == latest):
+        return bare_current, bare_latest
+    return current, latest
+
+
+def compare(current: str, latest: str, scheme: str = None) -> int:
+    """-1, 0 or 1 as `current` is older than, equal to or newer than `latest`."""
+    current, latest = _without_lone_epoch(current, latest)
+    scheme = scheme or common_scheme(current, latest)
+    a, b = parse(current, scheme).key, parse(latest, scheme).key
+    return (a > b) - (a < b)
+
+
+def classify(current: str, latest: str, scheme: str = None) -> tuple:
+    """(status, risk) for one app, parsing each version at most once."""
+    if latest in ("Unknown", "Pending"):
+        return ("Unknown ❓", "Unknown ❓") if latest == "Unknown" else ("Pending ⏳", "Pending ⏳")
+    if current == "Unknown":
+        return "Update Available ⚠️", "Unknown ❓"
+    if not _DIGITS.search(current) or not _DIGITS.search(latest):
+        # Not a version at all; only equality means anything
+        return ("Up-to-date ✅", "Low ✅") if current == latest else ("Update Available ⚠️", "High ⚠️")
+
+    current, latest = _without_lone_epoch(current, latest)
+    scheme = scheme or common_scheme(current, latest)
+    cur, lat = parse(current, scheme), parse(latest, scheme)
+    if cur.key >= lat.key:
+        return "Up-to-date ✅", "Low ✅"   # up-to-date or ahead
+    if cur.component(0) < lat.component(0):
+        return "Update Available ⚠️", "High 🔴"  # major version gap
+    if cur.component(1) < lat.component(1):
+        return "Update Available ⚠️", "Medium 🟠"  # minor version gap
+    return "Update Available ⚠️", "Low ⚠️"   # just patch behind
+
+
+def classify_many(pairs) -> list:
+    """Single pass over an inventory of (current, latest) pairs."""
+    return [classify(current, latest) for current, latest in pairs]
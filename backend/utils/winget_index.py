@@ -0,0 +1,121 @@
+import os
+import shutil
+import subprocess
+import threading
+import time
+from utils.circuit_breaker import BackendUnavailable
+from utils.metrics import count_spawn
+
+# --- Batch listing settings ---
+WINGET_INDEX_TTL = int(os.getenv("WINGET_INDEX_TTL", "300"))  # reuse one listing for this long
+WINGET_LIST_TIMEOUT = 120
+WINGET_LIST_COMMAND = [
+    "list",
+    "--accept-source-agreements",
+    "--disable-interactivity",
+]
+
+
+def parse_winget_table(output: str) -> list:
+    """
+    Parse the fixed-width table printed by `winget list` / `winget upgrade`:
+
+        Name           Id                Version   Available  Source
+        -------------------------------------------------------------
+        Node.js        OpenJS.NodeJS     20.11.0   22.3.0     winget
+
+    Column positions come from the header line. Returns dicts with
+    name, id, version and available ("" when already current).
+    """
+    # winget redraws a progress spinner with \r; keep only the final frame of each line
+    lines = [line.split("\r")[-1].rstrip() for line in output.splitlines()]
+
+    header_at = None
+    for i, line in enumerate(lines[:-1]):
+        if set(lines[i + 1].strip()) == {"-"} and " Id " in f" {line} " and "Version" in line:
+            header_at = i
+            break
+    if header_at is None:
+        return []
+
+    header = lines[header_at]
+    columns = ["Name", "Id", "Version", "Available", "Source"]
+    starts = [(col, header.find(col)) for col in columns if header.find(col) >= 0]
+    starts.sort(key=lambda c: c[1])
+
+    rows = []
+    for line in lines[header_at + 2:]:
+        if not line.strip():
+            continue
+        if line.strip()[0].isdigit() and "available" in line:
+            break  # trailing "N upgrade(s) available." footer
+        row = {}
+        for n, (col, start) in enumerate(starts):
+            end = starts[n + 1][1] if n + 1 < len(starts) else None
+            row[col] = line[start:end].strip()
+        if row.get("Id") and row.get("Version"):
+            rows.append({
+                "name": row.get("Name", ""),
+                "id": row["Id"],
+                "version": row["Version"],
+                "available": row.get("Available", ""),
+            })
+    return rows
+
+
+class WingetIndex:
+    """
+    id -> latest version index built from a single `winget list` run.
+
+    Packages with an "Available" column get that version; packages without
+    one are already at the latest version winget knows about.
+    """
+
+    def __init__(self, ttl: int = WINGET_INDEX_TTL):
+        self.ttl = ttl
+        self.by_id = {}
+        self.by_name = {}
+        self.loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def is_fresh(self) -> bool:
+        return bool(self.loaded_at) and time.time() - self.loaded_at < self.ttl
+
+    def load(self, output: str):
+        by_id, by_name = {}, {}
+        for row in parse_winget_table(output):
+            latest = row["available"] or row["version"]
+            by_id[row["id"].lower()] = latest
+            if row["name"] and not row["name"].endswith("…"):
+                by_name[row["name"].lower()] = latest
+        self.by_id, self.by_name = by_id, by_name
+        self.loaded_at = time.time()
+
+    def refresh(self) -> int:
+        """Run one bulk winget listing (at most once per TTL) and return the index size."""
+        with self._lock:
+            if not self.is_fresh():
+                winget = shutil.which("winget")
+                if winget is None:
+                    raise BackendUnavailable("winget is not installed")
+                count_spawn(winget)
+                output = subprocess.check_output(
+                    [winget, *WINGET_LIST_COMMAND],
+                    text=True,
+                    encoding="utf-8",
+                    errors="replace",
+                    stderr=subprocess.DEVNULL,
+                    timeout=WINGET_LIST_TIMEOUT,
+                )
+                self.load(output)
+            return len(self.by_id)
+
+    def get(self, query: str):
+        """Look a winget id (or display name) up in the index; None when absent."""
+        if not self.is_fresh():
+            return None
+        key = query.lower()
+        return self.by_id.get(key) or self.by_name.get(key)
+
+
+WINGET_INDEX = WingetIndex()
@@ -37,47 +37,34 @@ function App() {
   const [selectedMenu, setSelectedMenu] = useState("overview");
   const [lastScanTime, setLastScanTime] = useState(null);
 
-  // Fetch installed apps
-  const fetchApps = async () => {
+  // Fetch installed apps and drivers (missing + installed) in one request
+  const fetchInventory = async () => {
     setRefreshing(true);
     setLoading(true);
     try {
-      const res = await fetch("http://127.0.0.1:8000/scan");
+      const res = await fetch("http://127.0.0.1:8000/inventory");
       const data = await res.json();
-      const appsData = Array.isArray(data) ? data : Array.isArray(data.apps) ? data.apps : [];
-      setApps(appsData);
+      setApps(Array.isArray(data.apps) ? data.apps : []);
       setLastScanTime(new Date().toLocaleString());
+      const drivers = data.drivers || {};
+      setMissingDrivers(Array.isArray(drivers.missingDrivers) ? drivers.missingDrivers : []);
+      setInstalledDrivers(Array.isArray(drivers.installedDrivers) ? drivers.installedDrivers : []);
     } catch {
       setApps([]);
-    }
-    setLoading(false);
-    setRefreshing(false);
-  };
-
-  
-
-  // Fetch drivers (missing + installed)
-  const fetchDrivers = async () => {
-    try {
-      const res = await fetch("http://127.0.0.1:8001/drivers");
-      const data = await res.json();
-      setMissingDrivers(Array.isArray(data.missingDrivers) ? data.missingDrivers : []);
-      setInstalledDrivers(Array.isArray(data.installedDrivers) ? data.installedDrivers : []);
-    } catch {
       setMissingDrivers([]);
       setInstalledDrivers([]);
     }
+    setLoading(false);
+    setRefreshing(false);
   };
 
   // Initial fetch
   useEffect(() => {
-    fetchApps();
-    fetchDrivers();
+    fetchInventory();
   }, []);
 
   const handleRefresh = () => {
-    fetchApps();
-    fetchDrivers();
+    fetchInventory();
   };
 
   const handleDownloadZip = () => {
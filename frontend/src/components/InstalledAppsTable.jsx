@@ -8,6 +8,10 @@ import columnsData from "./InstalledAppsTableColumns";
 import { PieChart, Pie, Cell, Tooltip, Legend, ResponsiveContainer } from "recharts";
 
 const COLORS = ["#00ff00", "#ffa500"]; // green for installed, orange for not installed
+const API_URL = "http://127.0.0.1:8000";
+const MAX_RECONNECTS = 5; // give up on the attack stream after this many failed reconnects
+// Table column id -> /scan sort field
+const SORT_FIELDS = { name: "name", status: "status", riskLevel: "risk" };
 
 // Custom Tooltip for PieChart
 const CustomTooltip = ({ active, payload, label }) => {
@@ -33,6 +37,7 @@ const InstalledAppsTable = ({ data }) => {
   const [attackLogs, setAttackLogs] = useState([]);
   const [attackingApp, setAttackingApp] = useState(null);
   const [isAttacking, setIsAttacking] = useState(false);
+  const [reconnecting, setReconnecting] = useState(false);
   const eventSourceRef = useRef(null);
   const logsEndRef = useRef(null);
 
@@ -59,36 +64,112 @@ const InstalledAppsTable = ({ data }) => {
     setAttackingApp(appName);
     setAttackLogs(["💻 Initializing attack simulation..."]);
     setIsAttacking(true);
+    setReconnecting(false);
 
     const es = new EventSource(`http://localhost:8000/simulate-attack/${encodeURIComponent(appName)}`);
     eventSourceRef.current = es;
+    let failures = 0;
+
+    const stop = (message) => {
+      es.close();
+      setReconnecting(false);
+      setIsAttacking(false);
+      if (message) setAttackLogs((prev) => [...prev, message]);
+    };
+
+    es.onopen = () => {
+      failures = 0;
+      setReconnecting(false);
+    };
 
     es.onmessage = (event) => {
       setAttackLogs((prev) => [...prev, event.data]);
-      if (event.data.includes("Attack simulation complete!")) {
-        setIsAttacking(false);
-        es.close();
-      }
+      if (event.data.includes("Attack simulation complete!")) stop();
     };
 
+    es.addEventListener("end", () => stop());
+
+    // EventSource reconnects on its own and resumes via Last-Event-ID, but
+    // keeps retrying forever while the backend is down: cap the attempts
     es.onerror = () => {
-      setAttackLogs((prev) => [...prev, "❌ Error: connection lost"]);
-      setIsAttacking(false);
-      es.close();
+      failures += 1;
+      if (es.readyState === EventSource.CLOSED || failures > MAX_RECONNECTS) {
+        stop("❌ Error: connection lost");
+        return;
+      }
+      setReconnecting(true);
     };
   }, []);
 
-  const tableData = useMemo(() => data.map((row) => ({ ...row, handleAttack })), [data, handleAttack]);
+  // Filtering, sorting and paging happen on the server (/scan); the table
+  // only holds the current page. /scan pages by cursor, so the cursor of
+  // every page visited so far is kept to allow going back.
+  const [pageRows, setPageRows] = useState([]);
+  const [total, setTotal] = useState(0);
+  const [loadingPage, setLoadingPage] = useState(false);
+  const [search, setSearch] = useState("");
+  const cursorsRef = useRef([null]);
+
+  const tableData = useMemo(() => pageRows.map((row) => ({ ...row, handleAttack })), [pageRows, handleAttack]);
 
   const {
     getTableProps, getTableBodyProps, headerGroups, prepareRow,
-    page, pageOptions, state, setGlobalFilter, gotoPage, setPageSize
+    page, state, setGlobalFilter, gotoPage, setPageSize
   } = useTable(
-    { columns, data: tableData, initialState: { pageSize: 5 } },
+    {
+      columns,
+      data: tableData,
+      initialState: { pageSize: 5 },
+      manualGlobalFilter: true,
+      manualSortBy: true,
+      manualPagination: true,
+      pageCount: -1, // unknown up front; TablePagination uses `total`
+      autoResetPage: false,
+      autoResetSortBy: false,
+      autoResetGlobalFilter: false,
+    },
     useGlobalFilter, useSortBy, usePagination
   );
 
-  const { globalFilter, pageIndex, pageSize } = state;
+  const { globalFilter, pageIndex, pageSize, sortBy } = state;
+  const sortParam = sortBy.length && SORT_FIELDS[sortBy[0].id]
+    ? `${sortBy[0].desc ? "-" : ""}${SORT_FIELDS[sortBy[0].id]}`
+    : "";
+
+  // Debounce typing before asking the server
+  useEffect(() => {
+    const timer = setTimeout(() => setSearch(globalFilter || ""), 300);
+    return () => clearTimeout(timer);
+  }, [globalFilter]);
+
+  // A new query starts again from the first page
+  useEffect(() => {
+    cursorsRef.current = [null];
+    gotoPage(0);
+  }, [search, sortParam, pageSize, data, gotoPage]);
+
+  useEffect(() => {
+    const cursor = cursorsRef.current[pageIndex];
+    if (pageIndex > 0 && !cursor) return;
+    const params = new URLSearchParams({ limit: String(pageSize) });
+    if (search) params.set("q", search);
+    if (sortParam) params.set("sort", sortParam);
+    if (cursor) params.set("cursor", cursor);
+
+    let cancelled = false;
+    setLoadingPage(true);
+    fetch(`${API_URL}/scan?${params}`)
+      .then((res) => res.json())
+      .then((body) => {
+        if (cancelled) return;
+        setPageRows(Array.isArray(body.apps) ? body.apps : []);
+        setTotal(body.total || 0);
+        cursorsRef.current[pageIndex + 1] = body.next_cursor || null;
+      })
+      .catch(() => !cancelled && setPageRows([]))
+      .finally(() => !cancelled && setLoadingPage(false));
+    return () => { cancelled = true; };
+  }, [pageIndex, pageSize, search, sortParam, data]);
 
   return (
     <Box sx={{ p: 3, backgroundColor: "#0a0a0a", minHeight: "100vh" }}>
@@ -230,9 +311,10 @@ const InstalledAppsTable = ({ data }) => {
       </TableContainer>
 
       {/* Pagination */}
+      {loadingPage && <CircularProgress size={20} sx={{ color: "#00ffea", mt: 2 }} />}
       <TablePagination
         component="div"
-        count={pageOptions.length * pageSize}
+        count={total}
         page={pageIndex}
         onPageChange={(e, newPage) => gotoPage(newPage)}
         rowsPerPage={pageSize}
@@ -266,12 +348,18 @@ const InstalledAppsTable = ({ data }) => {
             ))}
             <div ref={logsEndRef} />
           </Box>
-          {isAttacking && <CircularProgress size={24} sx={{ color: "#00ffea" }} />}
+          {isAttacking && <CircularProgress size={24} sx={{ color: reconnecting ? "#ffa500" : "#00ffea" }} />}
+          {reconnecting && (
+            <Typography sx={{ color: "#ffa500", fontFamily: "monospace" }}>
+              ⚠️ Connection lost, reconnecting...
+            </Typography>
+          )}
           <Button
             variant="contained"
             onClick={() => {
               setAttackingApp(null);
               setAttackLogs([]);
+              setReconnecting(false);
               if (eventSourceRef.current) eventSourceRef.current.close();
             }}
             sx={{
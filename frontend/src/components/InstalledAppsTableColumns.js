@@ -10,11 +10,13 @@ const columns = [
   {
     Header: "Current Version",
     accessor: "current",
+    disableSortBy: true,
     Cell: ({ value }) => <span style={{ color: "#ccc" }}>{value}</span>,
   },
   {
     Header: "Latest Version",
     accessor: "latest",
+    disableSortBy: true,
     Cell: ({ value }) => <span style={{ color: "#ccc" }}>{value}</span>,
   },
   {
@@ -65,6 +67,7 @@ const columns = [
   {
     Header: "Actions",
     accessor: "actions",
+    disableSortBy: true,
     Cell: ({ row }) => {
       const handleMouseOver = (e) => {
         e.target.style.backgroundColor = "#00bcd4";